@@ -7,16 +7,68 @@ https://more-itertools.readthedocs.io/en/stable/index.html
 
 from __future__ import annotations
 
+import asyncio
+import heapq
+import os
+import pickle  # noqa: S403  # only loads what it dumps
+import sys
+from array import array
+from bisect import bisect_right, insort
 from collections import deque
-from collections.abc import Set
-from itertools import groupby
-from typing import TypeVar, overload
+from collections.abc import (
+    Awaitable,
+    MutableSequence,
+    MutableSet,
+    Sequence,
+    Set,
+)
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import partial, reduce
+from io import SEEK_END
+from itertools import (
+    chain,
+    compress,
+    count,
+    filterfalse,
+    groupby,
+    islice,
+    starmap,
+    tee,
+)
+from math import ceil, exp, floor, log, log1p
+from operator import add, gt, itemgetter, lt, not_
+from random import Random
+from tempfile import TemporaryFile
+from threading import Condition, Lock, Thread
+from typing import (
+    IO,
+    Any,
+    Generic,
+    Literal,
+    Protocol,
+    TypeVar,
+    overload,
+)
+from typing_extensions import Buffer
 
+from jamjam.classes import Singleton
 from jamjam.typing import (
+    AIter,
+    CanAIter,
     CanIter,
     Dots,
     Fn,
     Iter,
+    Seq,
     Three,
     Two,
     use_overloads,
@@ -26,6 +78,11 @@ D = TypeVar("D")
 K = TypeVar("K")
 R = TypeVar("R")
 T = TypeVar("T")
+X = TypeVar("X", contravariant=True)
+
+
+class _Done(Singleton):
+    "Marks an exhausted iterator."
 
 
 @overload
@@ -45,16 +102,1043 @@ def first() -> None:
 
 def ordered_set(iterable: CanIter[T]) -> Set[T]:
     "Cheap implementation of an ordered set."
-    return dict.fromkeys(iterable, 0).keys()
+    return OrderedSet(iterable)
+
+
+_Positional = tuple[list[T], dict[T, int], list[int]]
+"Slots of an ``OrderedSet``, its items' slots & the holes."
+
+
+class OrderedSet(MutableSet[T]):
+    """Set remembering insertion order.
+
+    Items are kept as keys of a dict, so ``add``,
+    ``discard``, membership & bulk ``update`` are as cheap as
+    the dict's. A list of items & their positions is made on
+    first use of ``index`` or ``[i]``, then kept in step with
+    appends. Removing from the middle leaves a hole, whose
+    slot is kept sorted so positions are found by bisecting.
+    Once over half the list is holes, it's compacted.
+    """
+
+    __slots__ = ("_keys", "_positional")
+
+    def __init__(self, iterable: CanIter[T] = ()) -> None:
+        self._keys: dict[T, None] = dict.fromkeys(iterable)
+        self._positional: _Positional[T] | None = None
+
+    def __contains__(self, v: object) -> bool:
+        return v in self._keys
+
+    def __iter__(self) -> Iter[T]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__qualname__}({[*self]!r})"
+
+    def __and__(self, other: Set[object]) -> OrderedSet[T]:
+        return OrderedSet(filter(other.__contains__, self))
+
+    @overload
+    def __getitem__(self, i: int) -> T: ...
+    @overload
+    def __getitem__(self, i: slice) -> OrderedSet[T]: ...
+    def __getitem__(
+        self, i: int | slice
+    ) -> T | OrderedSet[T]:
+        items, _, holes = self._index()
+        if isinstance(i, slice):
+            if holes:
+                self._positional = None
+                items, _, _ = self._index()
+            return OrderedSet(items[i])
+        n = len(self._keys)
+        if not -n <= i < n:
+            msg = "OrderedSet index out of range"
+            raise IndexError(msg)
+        i %= n
+        # skip holes with at most i items before them
+        before = partial(_before_hole, holes)
+        return items[
+            i
+            + bisect_right(range(len(holes)), i, key=before)
+        ]
+
+    def index(self, v: T) -> int:
+        "Find position of ``v``."
+        _, positions, holes = self._index()
+        try:
+            slot = positions[v]
+        except KeyError:
+            msg = f"{v!r} is not in set."
+            raise ValueError(msg) from None
+        return slot - bisect_right(holes, slot)
+
+    def add(self, value: T) -> None:
+        "Add ``value`` to the end, if not already present."
+        if value in self._keys:
+            return
+        self._keys[value] = None
+        if self._positional:
+            items, positions, _ = self._positional
+            positions[value] = len(items)
+            items.append(value)
+
+    def update(self, *iterables: CanIter[T]) -> None:
+        "Add all items of ``iterables``."
+        # kept to C loops, so bulk adds are cheap
+        for iterable in iterables:
+            new = dict.fromkeys(iterable)
+            if not self._positional:
+                self._keys.update(new)
+                continue
+            items, positions, _ = self._positional
+            known = self._keys.__contains__
+            fresh = [*filterfalse(known, new)]
+            self._keys.update(dict.fromkeys(fresh))
+            positions.update(zip(fresh, count(len(items))))
+            items.extend(fresh)
+
+    def discard(self, value: T) -> None:
+        "Remove ``value`` if present."
+        if value not in self._keys:
+            return
+        del self._keys[value]
+        if not self._positional:
+            return
+        items, positions, holes = self._positional
+        slot = positions.pop(value)
+        if slot == len(items) - 1:
+            items.pop()
+            return
+        items[slot] = _HOLE
+        insort(holes, slot)
+        if 2 * len(holes) > len(items):
+            self._positional = None  # compact on next use
+
+    def pop(self) -> T:
+        "Remove & return the last item."
+        if not self._keys:
+            msg = "pop from an empty set"
+            raise KeyError(msg)
+        v = next(reversed(self._keys))
+        self.discard(v)
+        return v
+
+    def clear(self) -> None:
+        "Remove all items."
+        self._keys.clear()
+        self._positional = None
+
+    def _index(self) -> _Positional[T]:
+        if not self._positional:
+            items = [*self._keys]
+            positions = dict(zip(items, count()))
+            self._positional = items, positions, []
+        return self._positional
+
+
+_HOLE: Any = object()
+"Placeholder for items removed from an ``OrderedSet``."
+
+
+def _before_hole(holes: list[int], j: int) -> int:
+    "Count the items before the ``j``th hole."
+    return holes[j] - j
+
+
+def _view(obj: object) -> memoryview | None:
+    try:
+        view = memoryview(obj)  # type: ignore[arg-type]
+    except TypeError:
+        return None
+    if view.ndim == 1:
+        return view
+    # chunk multi-dim buffers by their items, in C order
+    fmt: Any = view.format
+    raw = memoryview(
+        view if view.c_contiguous else view.tobytes()
+    )
+    try:
+        return raw.cast("B").cast(fmt)
+    except (TypeError, ValueError):  # eg non-native formats
+        return None
+
+
+def _view_chunks(
+    view: memoryview, n: int
+) -> Iter[memoryview]:
+    for i in range(0, len(view), n):
+        yield view[i : i + n]
+
+
+def _check_size(n: int, name: str = "Chunk size") -> None:
+    if n < 1:
+        msg = f"{name} must be at least 1; got {n}."
+        raise ValueError(msg)
+
+
+@overload
+def batched(it: Buffer, n: int) -> Iter[memoryview]: ...
+@overload
+def batched(
+    it: CanIter[T], n: int
+) -> Iter[tuple[T, ...]]: ...
+def batched(
+    it: Buffer | CanIter[T], n: int
+) -> Iter[memoryview] | Iter[tuple[T, ...]]:
+    """Split ``it`` into tuples of ``n`` items.
+
+    Buffers (eg ``bytes``, ``array``, ``mmap``) are instead
+    split into ``memoryview`` slices, so nothing is copied.
+    Multi-dim buffers are split by items in C order, copying
+    only if they aren't C-contiguous. The last batch may be
+    short.
+    """
+    _check_size(n)
+    if (view := _view(it)) is not None:
+        return _view_chunks(view, n)
+    return _batches(it, n)  # type: ignore[arg-type]
+
+
+def _batches(it: CanIter[T], n: int) -> Iter[tuple[T, ...]]:
+    items = iter(it)
+    return iter(lambda: tuple(islice(items, n)), ())
+
+
+@overload
+def chunked(obj: Buffer, n: int) -> Iter[memoryview]: ...
+@overload
+def chunked(obj: CanIter[T], n: int) -> Iter[Seq[T]]: ...
+def chunked(
+    obj: Buffer | CanIter[T], n: int
+) -> Iter[memoryview] | Iter[Seq[T]]:
+    """Split ``obj`` into chunks of ``n`` items.
+
+    As ``batched``, but sequences are split by slicing, so
+    chunks keep their type; eg ``str`` into ``str``. Other
+    iterables are split into tuples.
+    """
+    _check_size(n)
+    if (view := _view(obj)) is not None:
+        return _view_chunks(view, n)
+    if isinstance(obj, Sequence):
+        seq: Seq[T] = obj
+        return (
+            seq[i : i + n] for i in range(0, len(seq), n)
+        )
+    return batched(obj, n)
+
+
+def windowed(
+    it: CanIter[T],
+    n: int,
+    step: int = 1,
+    *,
+    copy: bool = False,
+) -> Iter[Seq[T]]:
+    """Slide a window of ``n`` items over ``it`` by ``step``.
+
+    Only full windows are made. Each is the same ring buffer
+    updated in place, so copy any to keep, or set ``copy`` to
+    get tuples. NumPy arrays instead give strided views along
+    their 1st axis, with no copying.
+    """
+    _check_size(n)
+    _check_size(step)
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(it, np.ndarray):
+        stride = np.lib.stride_tricks
+        views = stride.sliding_window_view(it, n, axis=0)
+        return iter(views[::step])
+    windows = _windows(iter(it), n, step)
+    return map(tuple, windows) if copy else windows
+
+
+def _windows(
+    items: Iter[T], n: int, step: int
+) -> Iter[Seq[T]]:
+    window = deque(islice(items, n), maxlen=n)
+    if len(window) < n:
+        return
+    yield window
+    if step == 1:
+        for v in items:
+            window.append(v)
+            yield window
+        return
+    # count items pulled, so no tuple is built per window
+    pulled = count(1)
+    counted = compress(items, pulled)
+    target = 1
+    while True:
+        window.extend(islice(counted, step))
+        target += step
+        if next(pulled) != target:
+            return  # ran out before a full step
+        target += 1
+        yield window
+
+
+def rolling_sum(it: CanIter[Any], n: int) -> Iter[Any]:
+    """Sum each window of ``n`` items, in O(1) per item.
+
+    The sum is kept running, so float errors can build up.
+    """
+    _check_size(n)
+    return _rolling_sum(it, n)
+
+
+def _rolling_sum(it: CanIter[Any], n: int) -> Iter[Any]:
+    items, lagged = tee(it)
+    head = [*islice(items, n)]
+    if len(head) < n:
+        return
+    total = sum(head)
+    yield total
+    for new, old in zip(items, lagged):
+        total += new - old
+        yield total
+
+
+def rolling_mean(it: CanIter[Any], n: int) -> Iter[Any]:
+    "Average each window of ``n`` items, as ``rolling_sum``."
+    return (total / n for total in rolling_sum(it, n))
+
+
+def rolling_min(it: CanIter[T], n: int) -> Iter[T]:
+    "Find least of each window of ``n`` items, in O(1) amortized."
+    _check_size(n)
+    return _rolling_best(it, n, lt)
+
+
+def rolling_max(it: CanIter[T], n: int) -> Iter[T]:
+    "Find greatest of each window of ``n`` items, in O(1) amortized."
+    _check_size(n)
+    return _rolling_best(it, n, gt)
+
+
+def _rolling_best(
+    it: CanIter[T], n: int, better: Fn[[Any, Any], object]
+) -> Iter[T]:
+    # monotonic deque: each later candidate is worse, so
+    # dropping the best as it expires leaves the next best
+    candidates = deque[tuple[int, T]]()
+    for i, v in enumerate(it):
+        while candidates and not better(
+            candidates[-1][1], v
+        ):
+            candidates.pop()
+        candidates.append((i, v))
+        if candidates[0][0] <= i - n:
+            candidates.popleft()
+        if i >= n - 1:
+            yield candidates[0][1]
+
+
+def top_k(
+    it: CanIter[T], k: int, key: Fn[[T], Any] | None = None
+) -> list[T]:
+    "Find ``k`` largest items, largest 1st, in O(k) memory."
+    return heapq.nlargest(k, it, key)
+
+
+def reservoir(
+    it: CanIter[T], k: int, seed: int | None = None
+) -> list[T]:
+    """Sample ``k`` items uniformly, in O(k) memory.
+
+    Uses skips (algorithm L) so only O(k log(n/k)) random
+    numbers are drawn for ``n`` items.
+    """
+    rng = Random(seed)
+    items = iter(it)
+    sample = [*islice(items, k)]
+    if len(sample) < k or not k:
+        return sample
+    w = exp(log(1 - rng.random()) / k)
+    while w < 1:
+        skip = floor(log(1 - rng.random()) / log1p(-w))
+        v = next(islice(items, skip, None), _Done())
+        if _Done.is_(v):
+            break
+        sample[rng.randrange(k)] = v
+        w *= exp(log(1 - rng.random()) / k)
+    return sample
+
+
+class QuantileSketch(Generic[T]):
+    """Mergeable sketch of a stream's quantiles (KLL).
+
+    Holds O(``k``) items, sampled to weights of powers of 2,
+    so estimated ranks are off by O(1 / ``k``) of the count.
+    Sketches of parts of a stream ``merge`` into one of the
+    whole, eg with ``Fold.sketch`` in ``gather(..., workers=n)``.
+    """
+
+    __slots__ = ("_k", "_levels", "_max_size", "_n", "_rng")
+
+    def __init__(
+        self, k: int = 200, seed: int | None = None
+    ) -> None:
+        self._k = k
+        self._n = 0
+        self._rng = Random(seed)
+        self._levels: list[list[T]] = []
+        self._max_size = 0
+        self._grow()
+
+    def __len__(self) -> int:
+        "Count items seen."
+        return self._n
+
+    def add(self, v: T) -> None:
+        "Add one item."
+        self._levels[0].append(v)
+        self._n += 1
+        if self._size() >= self._max_size:
+            self._compress()
+
+    def update(self, it: CanIter[T]) -> None:
+        "Add many items."
+        items = iter(it)
+        while room := self._max_size - self._size():
+            n = len(self._levels[0])
+            self._levels[0].extend(islice(items, room))
+            added = len(self._levels[0]) - n
+            self._n += added
+            if added < room:
+                return
+            self._compress()
+
+    def merge(self, other: QuantileSketch[T]) -> None:
+        "Add the items seen by ``other``."
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for ours, theirs in zip(self._levels, other._levels):
+            ours.extend(theirs)
+        self._n += other._n
+        while self._size() >= self._max_size:
+            self._compress()
+
+    def quantile(self, q: float) -> T:
+        "Estimate the ``q``-th quantile, for ``0 <= q <= 1``."
+        weighted = sorted(
+            (v, 1 << h)
+            for h, level in enumerate(self._levels)
+            for v in level
+        )
+        if not weighted:
+            msg = "No quantiles of an empty sketch."
+            raise ValueError(msg)
+        target = q * sum(w for _, w in weighted)
+        total = 0
+        for v, w in weighted:
+            total += w
+            if total >= target:
+                return v
+        return weighted[-1][0]
+
+    def _size(self) -> int:
+        return sum(map(len, self._levels))
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self._levels) - h - 1
+        return ceil(self._k * (2 / 3) ** depth) + 1
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = sum(
+            map(self._capacity, range(len(self._levels)))
+        )
+
+    def _compress(self) -> None:
+        for h, level in enumerate(self._levels):
+            if len(level) < self._capacity(h):
+                continue
+            if h + 1 == len(self._levels):
+                self._grow()
+            # keep every other item, at double the weight
+            level.sort()
+            odd = len(level) % 2
+            kept = level[
+                self._rng.randrange(2) : len(level) - odd : 2
+            ]
+            self._levels[h + 1].extend(kept)
+            del level[: len(level) - odd]
+            if self._size() < self._max_size:
+                return
+
+
+UniqueMode = Literal["exact", "lru", "bloom"]
+"How ``unique`` remembers items it's seen."
+
+
+def unique(
+    it: CanIter[T],
+    key: Fn[[T], Any] | None = None,
+    *,
+    mode: UniqueMode = "exact",
+    capacity: int = 10**6,
+    error_rate: float = 0.01,
+) -> Iter[T]:
+    """Yield items of ``it`` not seen before, by ``key``.
+
+    * ``"exact"`` remembers every key.
+    * ``"lru"`` remembers the last ``capacity`` keys seen, so
+      repeats further apart are yielded again.
+    * ``"bloom"`` remembers keys in a Bloom filter, of a size
+      to wrongly drop ``error_rate`` of new items once
+      ``capacity`` keys are held. Takes ~10 bits per key at
+      1%, rather than a set's ~60+ bytes.
+    """
+    if mode == "exact":
+        seen = set[Any]()
+        seen_add = seen.add
+        if key is None:
+            # the `or` adds the item, but is always False
+            return (
+                v
+                for v in it
+                if not (v in seen or seen_add(v))
+            )
+        return _unique_by(it, key, seen)
+    _check_size(capacity, "Capacity")
+    if mode == "lru":
+        return _unique_lru(it, key or _identity, capacity)
+    if not 0 < error_rate < 1:
+        msg = f"Error rate must be in (0, 1); got {error_rate}."
+        raise ValueError(msg)
+    bloom = _Bloom(capacity, error_rate)
+    if key is None:
+        return filterfalse(bloom.add, it)
+    items, to_key = tee(it)
+    found = map(bloom.add, map(key, to_key))
+    return compress(items, map(not_, found))
+
+
+def _unique_by(
+    it: CanIter[T], key: Fn[[T], Any], seen: set[Any]
+) -> Iter[T]:
+    for v in it:
+        k = key(v)
+        if k not in seen:
+            seen.add(k)
+            yield v
+
+
+def _unique_lru(
+    it: CanIter[T], key: Fn[[T], Any], capacity: int
+) -> Iter[T]:
+    recent: dict[Any, None] = {}
+    for v in it:
+        k = key(v)
+        if k in recent:
+            # move to the back, as most recently seen
+            del recent[k]
+            recent[k] = None
+            continue
+        recent[k] = None
+        if len(recent) > capacity:
+            del recent[next(iter(recent))]
+        yield v
+
+
+class _Bloom:
+    "Bit array set; may wrongly find keys never added."
+
+    _MASK = (1 << 64) - 1
+    _MIX = 0x9E3779B97F4A7C15  # golden ratio, for spread
+
+    def __init__(
+        self, capacity: int, error_rate: float
+    ) -> None:
+        bits = -capacity * log(error_rate) / log(2) ** 2
+        self.n_bits = max(8, ceil(bits))
+        self.n_hashes = max(
+            1, round(self.n_bits / capacity * log(2))
+        )
+        self.bits = bytearray((self.n_bits + 7) // 8)
+
+    def add(self, k: object) -> bool:
+        "Add ``k``, returning if it was (maybe) already in."
+        bits, n_bits = self.bits, self.n_bits
+        # both probe values from halves of the mixed hash
+        mixed = (hash(k) * self._MIX) & self._MASK
+        h, step = mixed & 0xFFFFFFFF, (mixed >> 32) | 1
+        found = True
+        for _ in range(self.n_hashes):
+            i = h % n_bits
+            bit = 1 << (i & 7)
+            if not bits[i >> 3] & bit:
+                bits[i >> 3] |= bit
+                found = False
+            h += step
+        return found
+
+
+def prefetch(
+    it: CanIter[T], depth: int = 256
+) -> Prefetcher[T]:
+    """Read ``it`` ahead on a background thread.
+
+    Up to ``depth`` items are queued while the consumer works
+    on earlier ones. The queue is only locked when one side
+    must wait for the other, so fast inputs cost little.
+    Errors from ``it`` are raised in order, after the items
+    before them. ``close`` the result to stop the thread once
+    its current item is read.
+    """
+    _check_size(depth)
+    return Prefetcher(iter(it), depth)
+
+
+class _Feed(Generic[T]):
+    "State shared by ``prefetch`` & its thread."
+
+    def __init__(self, items: Iter[T], depth: int) -> None:
+        self.items = items
+        self.depth = depth
+        self.half = max(1, depth // 2)
+        self.cond = Condition()
+        self.queued = deque[T]()
+        self.end: BaseException | _Done | None = None
+        self.closed = False
+        # Set by a side about to wait, & cleared by the other
+        # as it wakes it. The consumer is woken by the next
+        # item, but the thread only once the queue is half
+        # empty, so a fast consumer doesn't switch per item.
+        self.hungry = self.blocked = False
+
+    def fill(self) -> None:
+        end: BaseException | _Done = _Done()
+        queued, cond, half = (
+            self.queued,
+            self.cond,
+            self.half,
+        )
+        try:
+            for v in self.items:
+                if not self.closed:  # may be closed mid-read
+                    queued.append(
+                        v
+                    )  # atomic; no lock needed
+                if self.hungry:
+                    self.wake(hungry=True)
+                if len(queued) >= self.depth:
+                    with cond:
+                        while (
+                            len(queued) > half
+                            and not self.closed
+                        ):
+                            self.blocked = True
+                            cond.wait()
+                if self.closed:
+                    return
+        except BaseException as e:  # noqa: BLE001
+            end = e
+        with cond:
+            if not self.closed:
+                self.end = end
+            cond.notify()
+
+    def wake(self, *, hungry: bool) -> None:
+        "Wake the consumer if ``hungry``, else the thread."
+        with self.cond:
+            if hungry:
+                self.hungry = False
+            else:
+                self.blocked = False
+            self.cond.notify()
+
+
+class Prefetcher(Iter[T]):
+    "Iterator returned by ``prefetch``; see there."
+
+    def __init__(self, items: Iter[T], depth: int) -> None:
+        # the thread only refers to the feed, so dropping this
+        # iterator still closes it
+        self.feed = _Feed(items, depth)
+        Thread(target=self.feed.fill, daemon=True).start()
+
+    def __next__(self) -> T:
+        feed = self.feed
+        if feed.closed:
+            # the thread may add one last item while closing
+            raise StopIteration
+        try:
+            v = feed.queued.popleft()
+        except IndexError:
+            return self._wait()
+        if feed.blocked and len(feed.queued) <= feed.half:
+            feed.wake(hungry=False)
+        return v
+
+    def _wait(self) -> T:
+        feed = self.feed
+        with feed.cond:
+            while True:
+                # set before checking, so an item appended
+                # meanwhile is seen or wakes us
+                feed.hungry = True
+                if feed.queued or feed.end is not None:
+                    break
+                if feed.blocked:
+                    feed.blocked = False
+                    feed.cond.notify()
+                feed.cond.wait()
+            feed.hungry = False
+        if feed.queued:
+            return next(self)
+        if isinstance(feed.end, BaseException):
+            end, feed.end = feed.end, _Done()  # raise once
+            raise end
+        raise StopIteration
+
+    def close(self) -> None:
+        "Stop reading ahead & drop queued items."
+        feed = self.feed
+        with feed.cond:
+            feed.closed = True
+            feed.end = _Done()
+            feed.queued.clear()
+            feed.cond.notify()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+def replayable(
+    it: CanIter[T],
+    *,
+    memory_limit: int = 10**6,
+    serializer: Serializer = pickle,
+) -> Replayable[T]:
+    """Record ``it`` as it's read, so it can be read again.
+
+    See ``Replayable``.
+    """
+    return Replayable(it, memory_limit, serializer)
+
+
+class Replayable(CanIter[T]):
+    """Iterable reading its source once, for many replays.
+
+    Each ``iter`` starts a new replay from the 1st item, &
+    replays are independent, even across threads. Items are
+    read from the source only as the furthest replay needs
+    them. The first ``memory_limit`` are kept in memory, &
+    the rest are spilled to a temporary file with
+    ``serializer``.
+    """
+
+    _BATCH = 64
+    "Items read per lock, or per seek of the file."
+
+    def __init__(
+        self,
+        it: CanIter[T],
+        memory_limit: int,
+        serializer: Serializer,
+    ) -> None:
+        self._source = iter(it)
+        self._limit = memory_limit
+        self._serializer = serializer
+        self._mem: list[T] = []
+        self._file: IO[bytes] | None = None
+        self._offsets = array("q")  # of spilled items
+        self._lock = Lock()
+        self._done = False
+
+    def __iter__(self) -> Iter[T]:
+        i = 0
+        while batch := self._read(i):
+            yield from batch
+            i += len(batch)
+
+    def close(self) -> None:
+        "Delete spilled items; later replays can't read them."
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+    def _read(self, i: int) -> list[T]:
+        with self._lock:
+            if i < len(self._mem):
+                return self._mem[i : i + self._BATCH]
+            j = i - len(self._mem)
+            if self._file and j < len(self._offsets):
+                return self._load(self._file, j)
+            if self._done:
+                return []
+            v = next(self._source, _Done())
+            if _Done.is_(v):
+                self._done = True
+                return []
+            self._record(v)
+            return [v]
+
+    def _record(self, v: T) -> None:
+        if len(self._mem) < self._limit:
+            self._mem.append(v)
+            return
+        if self._file is None:
+            self._file = TemporaryFile()  # noqa: SIM115
+        self._file.seek(0, SEEK_END)
+        self._offsets.append(self._file.tell())
+        self._serializer.dump(v, self._file)
+
+    def _load(self, file: IO[bytes], j: int) -> list[T]:
+        file.seek(self._offsets[j])
+        n = min(self._BATCH, len(self._offsets) - j)
+        return [*_load(file, n, self._serializer)]
+
 
+PoolKind = Literal["thread", "process"]
+"Kind of pool ``pmap`` runs in."
 
-def split(
-    it: CanIter[T], pred: Fn[[T]] = bool
+
+# items per process task, so each outweighs its pickling
+_PROCESS_CHUNK = 32
+
+
+def pmap(  # noqa: PLR0913
+    fn: Fn[[T], R],
+    it: CanIter[T],
+    *,
+    workers: int | None = None,
+    kind: PoolKind = "thread",
+    ordered: bool = True,
+    prefetch: int | None = None,
+    chunk_size: int | None = None,
+) -> Iter[R]:
+    """Map ``fn`` over ``it`` in a pool of ``workers``.
+
+    Unlike ``Executor.map``, ``it`` is read lazily: at most
+    ``prefetch`` (default twice ``workers``) chunks of
+    ``chunk_size`` items are in flight at once, so ``it`` can
+    be huge or infinite. Results come in input order, or as
+    completed if not ``ordered``. ``chunk_size`` defaults to
+    1 for threads, and 32 for processes so each task
+    outweighs its pickling; tune it if ``fn`` is very cheap
+    or very slow.
+    """
+    if chunk_size is None:
+        chunk_size = (
+            1 if kind == "thread" else _PROCESS_CHUNK
+        )
+    _check_size(chunk_size)
+    if prefetch is None:
+        prefetch = 2 * (workers or os.cpu_count() or 1)
+    if prefetch < 1:
+        msg = f"Prefetch must be at least 1; got {prefetch}."
+        raise ValueError(msg)
+    pool = (
+        ThreadPoolExecutor
+        if kind == "thread"
+        else ProcessPoolExecutor
+    )
+    chunks = _batches(it, chunk_size)
+    # pool made on first ``next``, so unused maps cost none
+    new_pool = partial(pool, workers)
+    return _pmap(
+        fn, chunks, new_pool, prefetch, ordered=ordered
+    )
+
+
+def _pmap(
+    fn: Fn[[T], R],
+    chunks: Iter[tuple[T, ...]],
+    new_pool: Fn[[], Executor],
+    prefetch: int,
+    *,
+    ordered: bool,
+) -> Iter[R]:
+    executor = new_pool()
+    pending = deque[Future[list[R]]]()
+    try:
+        for chunk in chunks:
+            if len(pending) >= prefetch:
+                yield from _completed(
+                    pending, ordered=ordered
+                )
+            pending.append(
+                executor.submit(_map_chunk, fn, chunk)
+            )
+        while pending:
+            yield from _completed(pending, ordered=ordered)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _map_chunk(
+    fn: Fn[[T], R], chunk: tuple[T, ...]
+) -> list[R]:
+    return [*map(fn, chunk)]
+
+
+def _completed(
+    pending: deque[Future[list[R]]], *, ordered: bool
+) -> Iter[R]:
+    if ordered:
+        yield from pending.popleft().result()
+        return
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield from future.result()
+
+
+class Serializer(Protocol):
+    "Writes & reads objects to & from files; eg ``pickle``."
+
+    def dump(self, obj: Any, file: IO[bytes], /) -> None: ...
+    def load(self, file: IO[bytes], /) -> Any: ...
+
+
+Overflow = Literal["raise", "block", "spill"]
+"What to do when a buffer is full."
+
+
+class _SpillQueue(Generic[T]):
+    """FIFO queue keeping at most ``limit`` items in memory.
+
+    Overflow is written to a temporary file and read back in
+    batches of ``limit`` once the in-memory items run out.
+    """
+
+    def __init__(
+        self, limit: int, serializer: Serializer
+    ) -> None:
+        self.limit = limit
+        self.serializer = serializer
+        self.mem = deque[T]()
+        self.file: IO[bytes] | None = None
+        self.n_spilled = 0
+        self.read_pos = 0
+
+    def __len__(self) -> int:
+        return len(self.mem) + self.n_spilled
+
+    def append(self, v: T) -> None:
+        if not self.n_spilled and len(self.mem) < self.limit:
+            self.mem.append(v)
+            return
+        if self.file is None:
+            self.file = TemporaryFile()  # noqa: SIM115
+            self.read_pos = 0
+        self.serializer.dump(v, self.file)
+        self.n_spilled += 1
+
+    def popleft(self) -> T:
+        if not self.mem and self.file is not None:
+            self.file.seek(self.read_pos)
+            n = min(self.limit, self.n_spilled)
+            self.mem.extend(
+                self.serializer.load(self.file)
+                for _ in range(n)
+            )
+            self.read_pos = self.file.tell()
+            self.n_spilled -= n
+            if self.n_spilled:
+                # ready for the next append
+                self.file.seek(0, SEEK_END)
+            else:
+                self.file.close()
+                self.file = None
+        return self.mem.popleft()
+
+
+def split(  # noqa: PLR0913
+    it: CanIter[T],
+    pred: Fn[[T]] = bool,
+    *,
+    max_buffer: int | None = None,
+    overflow: Overflow = "raise",
+    serializer: Serializer = pickle,
+    vectorized: bool = False,
 ) -> Two[Iter[T]]:
-    "Split ``it`` in two based on ``pred``."
+    """Split ``it`` in two based on ``pred``.
+
+    Items for one side are buffered while the other is read.
+    See ``split_by`` for bounding that buffer. For 1D NumPy
+    arrays, a ``pred`` that's ``bool``, a unary ufunc or marked
+    ``vectorized`` is called once on the whole array to get a
+    mask, which is then used as in ``split_by``.
+    """
     # similar to `more_itertools.partition`
+    np = _numpy_1d(it)
+    if np is not None:
+        flags = (
+            it
+            if pred is bool
+            else _np_apply(
+                np, pred, it, vectorized=vectorized
+            )
+        )
+        if flags is not None:
+            return split_by(it, flags)
+    items, to_test = tee(it)
+    return split_by(
+        items,
+        map(pred, to_test),
+        max_buffer=max_buffer,
+        overflow=overflow,
+        serializer=serializer,
+    )
+
+
+def split_by(
+    it: CanIter[T],
+    flags: CanIter[object],
+    *,
+    max_buffer: int | None = None,
+    overflow: Overflow = "raise",
+    serializer: Serializer = pickle,
+) -> Two[Iter[T]]:
+    """Split ``it`` in two based on the parallel ``flags``.
 
-    iterator = iter(it)
+    Use ``max_buffer`` to bound the items held for the side
+    not being read. Once full, the ``overflow`` options are:
+
+    * ``"raise"`` a ``BufferError``.
+    * ``"block"`` until another thread reads the other side.
+      Both sides are then safe to read from separate threads,
+      but reading both from one thread will deadlock.
+    * ``"spill"`` extra items to a temporary file, written
+      & read with ``serializer``.
+
+    A 1D NumPy array with a ``flags`` array is split with a
+    boolean mask instead, so both sides are copied at once.
+    """
+    # `split` but with predicates pre-applied, so callers can
+    # keep them in C (eg with `map`) as in `compress`.
+    arr: Any = it
+    np = _numpy_1d(arr)
+    if np is not None and isinstance(flags, np.ndarray):
+        mask = flags.astype(bool)
+        if mask.shape == arr.shape:
+            return iter(arr[mask]), iter(arr[~mask])
+    if max_buffer is None:
+        return _split_unbounded(zip(it, flags))
+    sides = _classify(
+        zip(it, map(bool, flags)),
+        (True, False),
+        max_buffer,
+        overflow,
+        serializer,
+    )
+    return sides[True], sides[False]
+
+
+def _split_unbounded(
+    pairs: Iter[tuple[T, object]],
+) -> Two[Iter[T]]:
+    # without a bound, plain generators over deques are much
+    # cheaper per item than `_Splitter`
     good_q = deque[T]()
     bad_q = deque[T]()
 
@@ -67,10 +1151,10 @@ def split(
                 continue
 
             try:
-                v = next(iterator)
+                v, flag = next(pairs)
             except StopIteration:
                 return
-            if (not side) ^ bool(pred(v)):
+            if (not side) ^ bool(flag):
                 yield v
                 continue
             theirs.append(v)
@@ -80,15 +1164,878 @@ def split(
     return goods, bads
 
 
-def gather(
-    it: CanIter[T], by: Fn[[T], K], into: Fn[[Iter[T]], R]
+def classify(  # noqa: PLR0913
+    it: CanIter[T],
+    key: Fn[[T], K],
+    keys: CanIter[K],
+    *,
+    max_buffer: int | None = None,
+    overflow: Overflow = "raise",
+    serializer: Serializer = pickle,
+) -> dict[K, Iter[T]]:
+    """Split ``it`` in one pass to an iterator per ``keys``.
+
+    Each item goes to the iterator of its ``key``, which
+    must be one of ``keys``. As in ``split_by``, items for
+    other iterators are buffered while one is read, with
+    ``max_buffer`` & ``overflow`` bounding each buffer.
+    """
+    items, to_key = tee(it)
+    pairs = zip(items, map(key, to_key))
+    return _classify(
+        pairs, keys, max_buffer, overflow, serializer
+    )
+
+
+def _classify(
+    pairs: Iter[tuple[T, K]],
+    keys: CanIter[K],
+    limit: int | None,
+    overflow: Overflow,
+    serializer: Serializer,
+) -> dict[K, Iter[T]]:
+    queues: _Queues[K, T]
+    queues, limit = _split_queues(
+        keys, limit, overflow, serializer
+    )
+    cond = Condition() if overflow == "block" else None
+    splitter = _Splitter(pairs, queues, limit, cond)
+    return {k: splitter.side(k) for k in queues}
+
+
+_Queues = dict[K, deque[T] | _SpillQueue[T]]
+"Buffered items for each side of a split."
+
+
+def _split_queues(
+    keys: CanIter[K],
+    limit: int | None,
+    overflow: Overflow,
+    serializer: Serializer,
+) -> tuple[_Queues[K, T], int | None]:
+    if limit is not None and overflow == "spill":
+        queues: _Queues[K, T] = {
+            k: _SpillQueue(limit, serializer) for k in keys
+        }
+        return queues, None  # never full
+    return {k: deque() for k in keys}, limit
+
+
+class _Splitter(Generic[T, K]):
+    "Shared state behind the iterators of ``classify``."
+
+    def __init__(
+        self,
+        pairs: Iter[tuple[T, K]],
+        queues: _Queues[K, T],
+        limit: int | None,
+        cond: Condition | None,
+    ) -> None:
+        self.pairs = pairs
+        self.queues = queues
+        self.limit = limit
+        self.cond = cond
+        # pulled item waiting for room in its full queue
+        self.held: tuple[T, K] | None = None
+        self.done = False
+
+    def pull(self, key: K) -> T | _Done:
+        ours = self.queues[key]
+        while True:
+            if ours:
+                return ours.popleft()
+            if self.done:
+                return _Done()
+            if self.held is None:
+                try:
+                    self.held = next(self.pairs)
+                except StopIteration:
+                    self.done = True
+                    return _Done()
+
+            v, k = self.held
+            if k == key:
+                self.held = None
+                return v
+            try:
+                theirs = self.queues[k]
+            except KeyError:
+                msg = f"Key {k!r} is not one of {[*self.queues]}."
+                raise KeyError(msg) from None
+            if (
+                self.limit is not None
+                and len(theirs) >= self.limit
+            ):
+                if self.cond is None:
+                    msg = f"Split buffer over {self.limit} items."
+                    raise BufferError(msg)
+                self.cond.wait()
+                continue
+            theirs.append(v)
+            self.held = None
+
+    def side(self, key: K) -> Iter[T]:
+        return _Side(self, key)
+
+
+class _Side(Iter[T]):
+    """An iterator of ``classify``.
+
+    Not a generator, so reading can go on after a
+    ``BufferError`` once other sides have been read.
+    """
+
+    __slots__ = ("key", "queue", "splitter")
+
+    def __init__(
+        self, splitter: _Splitter[T, Any], key: object
+    ) -> None:
+        self.splitter = splitter
+        self.key = key
+        self.queue = splitter.queues[key]
+
+    def __next__(self) -> T:
+        splitter = self.splitter
+        if splitter.cond is None:
+            if self.queue:  # skip `pull` for buffered items
+                return self.queue.popleft()
+            v = splitter.pull(self.key)
+        else:
+            with splitter.cond:
+                v = splitter.pull(self.key)
+                splitter.cond.notify_all()
+        if _Done.is_(v):
+            raise StopIteration
+        return v
+
+
+def _one(_: object) -> int:
+    return 1
+
+
+def _inc(n: int, _: object) -> int:
+    return n + 1
+
+
+def _identity(v: T) -> T:
+    return v
+
+
+def _keep_first(v: T, _: object) -> T:
+    return v
+
+
+def _keep_last(_: object, v: T) -> T:
+    return v
+
+
+def _new_sketch(k: int, v: T) -> QuantileSketch[T]:
+    sketch = QuantileSketch[T](k)
+    sketch.add(v)
+    return sketch
+
+
+def _sketch_add(
+    sketch: QuantileSketch[T], v: T
+) -> QuantileSketch[T]:
+    sketch.add(v)
+    return sketch
+
+
+def _sketch_merge(
+    sketch: QuantileSketch[T], other: QuantileSketch[T]
+) -> QuantileSketch[T]:
+    sketch.merge(other)
+    return sketch
+
+
+@dataclass(frozen=True)
+class Fold(Generic[X, R]):
+    """Incremental reducer of groups for ``gather``.
+
+    Each group is reduced as it's items arrive, so is never
+    stored. Built-in folds are picklable, so can be used by
+    process pools.
+    """
+
+    step: Fn[[R, X], R]
+    "Combine the running value with the next item."
+    start: Fn[[X], R]
+    "Make the running value from a group's first item."
+    merge: Fn[[R, R], R] | None = None
+    "Combine running values of consecutive parts of a group."
+
+    def reduce(self, it: CanIter[X]) -> R:
+        "Fold a single (non-empty) group."
+        items = iter(it)
+        return reduce(
+            self.step, items, self.start(next(items))
+        )
+
+    @staticmethod
+    def count() -> Fold[object, int]:
+        "Count items in each group."
+        return Fold(_inc, _one, add)
+
+    @staticmethod
+    def sum() -> Fold[Any, Any]:
+        "Sum the items of each group."
+        return Fold(add, _identity, add)
+
+    @staticmethod
+    def min() -> Fold[Any, Any]:
+        "Find the least item of each group."
+        return Fold(min, _identity, min)
+
+    @staticmethod
+    def max() -> Fold[Any, Any]:
+        "Find the greatest item of each group."
+        return Fold(max, _identity, max)
+
+    @staticmethod
+    def first() -> Fold[T, T]:
+        "Keep the first item of each group."
+        return Fold(_keep_first, _identity, _keep_first)
+
+    @staticmethod
+    def last() -> Fold[T, T]:
+        "Keep the last item of each group."
+        return Fold(_keep_last, _identity, _keep_last)
+
+    @staticmethod
+    def sketch(
+        k: int = 200,
+    ) -> Fold[Any, QuantileSketch[Any]]:
+        "Sketch quantiles of each group; see ``QuantileSketch``."
+        start = partial(_new_sketch, k)
+        return Fold(_sketch_add, start, _sketch_merge)
+
+
+def _new_list(v: T) -> list[T]:
+    return [v]
+
+
+def _append(vs: list[T], v: T) -> list[T]:
+    vs.append(v)
+    return vs
+
+
+def _extend(vs: list[T], more: list[T]) -> list[T]:
+    vs.extend(more)
+    return vs
+
+
+_APPEND = Fold[Any, list](_append, _new_list, _extend)
+"Collects groups into lists."
+
+GatherMode = Literal["adjacent", "hash"]
+"How ``gather`` finds groups."
+
+
+def gather(  # noqa: PLR0913
+    it: CanIter[T],
+    by: Fn[[T], K],
+    into: Fn[[Iter[T]], R] | Fold[T, R],
+    *,
+    mode: GatherMode = "adjacent",
+    workers: int | None = None,
+    chunk_size: int = 1000,
+    vectorized: bool = False,
 ) -> dict[K, R]:
-    "Gather ``it`` into dict of choice type."
+    """Gather ``it`` into dict of choice type.
+
+    By default only adjacent items are grouped, as in
+    ``groupby``, so later groups overwrite earlier ones with
+    the same key. With ``mode="hash"`` all items with equal
+    keys are grouped in a single pass. Give ``into`` as a
+    ``Fold`` to reduce groups incrementally, so memory is
+    O(number of keys) rather than O(number of items).
+
+    With ``workers``, hash mode gathering of ``chunk_size``
+    batches of ``it`` is spread over a process pool, then
+    merged. Folds then need a ``merge``, and ``by`` & ``into``
+    must be picklable.
+
+    For 1D NumPy arrays, a ``by`` that's a unary ufunc or
+    marked ``vectorized`` is called once on the whole array to
+    get all keys. Groups are then found with array ops
+    (ignoring ``workers``), and built-in folds other than
+    ``sketch`` use ufuncs rather than a Python loop.
+    """
     # useful over plain dict(groupby(...)) as can return
     # dict[X, list] easily as oppose to dict[X, Iter]
+    np = _numpy_1d(it)
+    keys = (
+        None
+        if np is None
+        else _np_apply(np, by, it, vectorized=vectorized)
+    )
+    if keys is not None:
+        return _np_gather(np, it, keys, into, mode)
+    if workers is not None:
+        if mode != "hash":
+            msg = "Only hash mode can use workers."
+            raise ValueError(msg)
+        return _gather_sharded(
+            it, by, into, workers, chunk_size
+        )
+    if isinstance(into, Fold):
+        if mode == "hash":
+            return _hash_fold(it, by, into)
+        into = into.reduce
+    if mode == "hash":
+        groups = _hash_fold(it, by, _APPEND)
+        return {k: into(iter(g)) for k, g in groups.items()}
     return {k: into(v) for k, v in groupby(it, by)}
 
 
+def _hash_fold(
+    it: CanIter[T], by: Fn[[T], K], fold: Fold[T, R]
+) -> dict[K, R]:
+    step, start = fold.step, fold.start
+    missing: Any = object()
+    result: dict[K, R] = {}
+    for v in it:
+        k = by(v)
+        acc = result.get(k, missing)
+        result[k] = (
+            start(v) if acc is missing else step(acc, v)
+        )
+    return result
+
+
+def _gather_sharded(
+    it: CanIter[T],
+    by: Fn[[T], K],
+    into: Fn[[Iter[T]], R] | Fold[T, R],
+    workers: int,
+    chunk_size: int,
+) -> dict[K, R]:
+    _check_size(workers, "Workers")
+    _check_size(chunk_size)
+    fold: Fold[T, Any] = (
+        into if isinstance(into, Fold) else _APPEND
+    )
+    merge = fold.merge
+    if merge is None:
+        msg = f"{fold} needs a merge to use workers."
+        raise ValueError(msg)
+
+    result: dict[K, Any] = {}
+    parts = pmap(
+        partial(_hash_fold, by=by, fold=fold),
+        _batches(it, chunk_size),
+        workers=workers,
+        kind="process",
+    )
+    # merged in order so ``first`` & ``last`` hold
+    for part in parts:
+        _merge_into(result, part, merge)
+
+    if isinstance(into, Fold):
+        return result
+    return {k: into(iter(g)) for k, g in result.items()}
+
+
+def _merge_into(
+    result: dict[K, R],
+    part: dict[K, R],
+    merge: Fn[[R, R], R],
+) -> None:
+    missing: Any = object()
+    for k, v in part.items():
+        acc = result.get(k, missing)
+        result[k] = v if acc is missing else merge(acc, v)
+
+
+def _numpy_1d(obj: object) -> Any:
+    "Get NumPy if ``obj`` is a 1D array, without importing."
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(obj, np.ndarray):
+        return np if obj.ndim == 1 else None
+    return None
+
+
+def _np_apply(
+    np: Any,
+    fn: Fn[[Any], Any],
+    arr: Any,
+    *,
+    vectorized: bool,
+) -> Any:
+    "Call ``fn`` on all of ``arr`` if known to be elementwise."
+    ufunc = isinstance(fn, np.ufunc) and fn.nin == 1
+    if not (ufunc or vectorized):
+        return None
+    out = fn(arr)
+    if (
+        not isinstance(out, np.ndarray)
+        or out.shape != arr.shape
+    ):
+        msg = f"Vectorized {fn} must give 1 value per item."
+        raise ValueError(msg)
+    return out
+
+
+def _np_gather(
+    np: Any,
+    arr: Any,
+    keys: Any,
+    into: Fn[[Any], Any] | Fold[Any, Any],
+    mode: GatherMode,
+) -> dict[Any, Any]:
+    if not len(arr):
+        return {}
+    if mode == "hash":
+        return _np_hash_gather(np, arr, keys, into)
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    values = _np_runs_fold(np, arr, starts, into)
+    found = keys[starts].tolist()
+    return dict(zip(found, values, strict=True))
+
+
+def _np_runs_fold(
+    np: Any,
+    arr: Any,
+    starts: Any,
+    into: Fn[[Any], Any] | Fold[Any, Any],
+) -> Any:
+    if isinstance(into, Fold):
+        step, start = into.step, into.start
+        ufunc = _NP_UFUNCS.get(step)
+        if start is _identity and ufunc is not None:
+            return getattr(np, ufunc).reduceat(arr, starts)
+        if start is _identity and step is _keep_first:
+            return arr[starts]
+        ends = np.append(starts[1:], len(arr))
+        if start is _identity and step is _keep_last:
+            return arr[ends - 1]
+        if start is _one and step is _inc:
+            return ends - starts
+        into = into.reduce
+    groups = np.split(arr, starts[1:])
+    return map(into, map(iter, groups))
+
+
+def _np_hash_gather(
+    np: Any,
+    arr: Any,
+    keys: Any,
+    into: Fn[[Any], Any] | Fold[Any, Any],
+) -> dict[Any, Any]:
+    # a stable argsort of keys is slow, so factorize first
+    found, codes = _np_factorize(np, keys)
+    index = np.arange(len(arr))
+    firsts = np.full(len(found), len(arr))
+    np.minimum.at(firsts, codes, index)
+    values = _np_hash_fold(np, arr, codes, firsts, into)
+    # as dicts would, order groups by first appearance
+    rank = np.argsort(firsts).tolist()
+    found = found.tolist()
+    return {found[i]: values[i] for i in rank}
+
+
+def _np_factorize(np: Any, keys: Any) -> Two[Any]:
+    "Get sorted distinct ``keys`` & codes indexing them."
+    kind, size = keys.dtype.kind, keys.dtype.itemsize
+    if kind not in "biu" or (kind == "u" and size == 8):
+        return np.unique(keys, return_inverse=True)
+    ints = keys.astype(np.int64, copy=False)
+    lo = ints.min()
+    if int(ints.max()) - int(lo) >= 2 * len(ints):
+        return np.unique(keys, return_inverse=True)
+    # dense ints can be counted rather than sorted
+    shifted = ints - lo
+    seen = np.bincount(shifted) > 0
+    found = np.flatnonzero(seen) + lo
+    codes = (np.cumsum(seen) - 1)[shifted]
+    return found.astype(keys.dtype), codes
+
+
+def _np_hash_fold(
+    np: Any,
+    arr: Any,
+    codes: Any,
+    firsts: Any,
+    into: Fn[[Any], Any] | Fold[Any, Any],
+) -> Any:
+    if isinstance(into, Fold):
+        step, start = into.step, into.start
+        ufunc = _NP_UFUNCS.get(step)
+        if start is _identity and ufunc is not None:
+            out = arr[firsts]
+            rest = np.ones(len(arr), dtype=bool)
+            rest[firsts] = False
+            getattr(np, ufunc).at(
+                out, codes[rest], arr[rest]
+            )
+            return out
+        if start is _identity and step is _keep_first:
+            return arr[firsts]
+        if start is _identity and step is _keep_last:
+            lasts = firsts.copy()
+            np.maximum.at(lasts, codes, np.arange(len(arr)))
+            return arr[lasts]
+        if start is _one and step is _inc:
+            return np.bincount(codes)
+        into = into.reduce
+    # few groups allow a (stable) radix sort of the codes
+    small = len(firsts) <= _NP_RADIX_MAX
+    codes = codes.astype(np.uint16) if small else codes
+    order = np.argsort(codes, kind="stable")
+    ends = np.cumsum(np.bincount(codes))
+    groups = np.split(arr[order], ends[:-1])
+    return list(map(into, map(iter, groups)))
+
+
+_NP_UFUNCS: dict[object, str] = {
+    add: "add",
+    min: "minimum",
+    max: "maximum",
+}
+_NP_RADIX_MAX = 2**16
+
+
+def merge_sorted(
+    *its: CanIter[T],
+    key: Fn[[T], Any] | None = None,
+    unique: bool = False,
+) -> Iter[T]:
+    """Merge already sorted ``its`` into one sorted iterator.
+
+    A heap merge, so O(log k) per item for k inputs, with a
+    plain 2-way merge when k is 2. Ties keep input order. If
+    ``unique``, only the first of adjacent equal items (by
+    ``key``) is kept.
+    """
+    if len(its) == 2:
+        a, b = map(iter, its)
+        merged = _merge2(a, b, key or _identity)
+    elif len(its) == 1:
+        merged = iter(its[0])
+    else:
+        merged = heapq.merge(*its, key=key)
+    if unique:
+        return (next(g) for _, g in groupby(merged, key))
+    return merged
+
+
+def _merge2(
+    a: Iter[T], b: Iter[T], key: Fn[[T], Any]
+) -> Iter[T]:
+    done: Any = _Done()
+    x, y = next(a, done), next(b, done)
+    if x is not done and y is not done:
+        kx, ky = key(x), key(y)
+        while True:
+            if ky < kx:
+                yield y
+                y = next(b, done)
+                if y is done:
+                    break
+                ky = key(y)
+            else:
+                yield x
+                x = next(a, done)
+                if x is done:
+                    break
+                kx = key(x)
+    if x is not done:
+        yield x
+        yield from a
+    if y is not done:
+        yield y
+        yield from b
+
+
+def gather_external(
+    it: CanIter[T],
+    by: Fn[[T], K],
+    into: Fn[[Iter[T]], R] | Fold[T, R],
+    *,
+    memory_limit: int = 10**6,
+    serializer: Serializer = pickle,
+) -> dict[K, R]:
+    """Gather an input too large to sort in memory.
+
+    Same as ``gather(sorted(it, key=by), by, into)``, but
+    holds at most ``memory_limit`` items at once. Sorted
+    runs are spilled to temporary files with ``serializer``
+    then merged, so equal keys become adjacent.
+    """
+    _check_size(memory_limit, "Memory limit")
+    if isinstance(into, Fold):
+        into = into.reduce
+    key = itemgetter(0)
+    pairs = ((by(v), v) for v in it)
+    with ExitStack() as stack:
+        runs: list[Iter[tuple[K, T]]] = []
+        while run := list(islice(pairs, memory_limit)):
+            run.sort(key=key)
+            if not runs and len(run) < memory_limit:
+                runs.append(iter(run))  # fits; no spill
+                break
+            file = stack.enter_context(TemporaryFile())
+            for pair in run:
+                serializer.dump(pair, file)
+            file.seek(0)
+            runs.append(_load(file, len(run), serializer))
+            del run  # free before reading the next
+
+        merged = merge_sorted(*runs, key=key)
+        return {
+            k: into(map(itemgetter(1), group))
+            for k, group in groupby(merged, key)
+        }
+
+
+def _load(
+    file: IO[bytes], n: int, serializer: Serializer
+) -> Iter[Any]:
+    for _ in range(n):
+        yield serializer.load(file)
+
+
+@overload
+async def afirst(it: CanAIter[T]) -> T:
+    return await anext(aiter(it))
+
+
+@overload
+async def afirst(it: CanAIter[T], default: D) -> T | D:
+    return await anext(aiter(it), default)
+
+
+@use_overloads
+def afirst() -> None:
+    "Get 1st item of async ``it``, or ``default``."
+
+
+def asplit(
+    it: CanAIter[T],
+    pred: Fn[[T]] = bool,
+    *,
+    max_buffer: int | None = None,
+    overflow: Overflow = "raise",
+    serializer: Serializer = pickle,
+) -> Two[AIter[T]]:
+    """Split async ``it`` in two based on ``pred``.
+
+    As ``split``, but with ``overflow="block"`` the sides
+    must be read from separate tasks rather than threads.
+    """
+    splitter = _ASplitter[T](
+        _flagged(it, pred), max_buffer, overflow, serializer
+    )
+    return splitter.side(good=True), splitter.side(
+        good=False
+    )
+
+
+async def _flagged(
+    it: CanAIter[T], pred: Fn[[T]]
+) -> AIter[tuple[T, object]]:
+    async for v in it:
+        yield v, pred(v)
+
+
+class _ASplitter(Generic[T]):
+    "Shared state behind the async iterators of ``asplit``."
+
+    def __init__(
+        self,
+        pairs: AIter[tuple[T, object]],
+        limit: int | None,
+        overflow: Overflow,
+        serializer: Serializer,
+    ) -> None:
+        self.pairs = pairs
+        self.queues: _Queues[bool, T]
+        self.queues, self.limit = _split_queues(
+            (True, False), limit, overflow, serializer
+        )
+        # also stops both sides pulling from pairs at once
+        self.cond = asyncio.Condition()
+        self.block = overflow == "block"
+        # pulled item waiting for room in its full queue
+        self.held: tuple[T, object] | None = None
+        self.done = False
+
+    async def pull(self, *, good: bool) -> T | _Done:
+        ours = self.queues[good]
+        theirs = self.queues[not good]
+        while True:
+            if ours:
+                return ours.popleft()
+            if self.done:
+                return _Done()
+            if self.held is None:
+                try:
+                    self.held = await anext(self.pairs)
+                except StopAsyncIteration:
+                    self.done = True
+                    return _Done()
+
+            v, flag = self.held
+            if bool(flag) is good:
+                self.held = None
+                return v
+            if (
+                self.limit is not None
+                and len(theirs) >= self.limit
+            ):
+                if not self.block:
+                    msg = f"Split buffer over {self.limit} items."
+                    raise BufferError(msg)
+                await self.cond.wait()
+                continue
+            theirs.append(v)
+            self.held = None
+
+    def side(self, *, good: bool) -> AIter[T]:
+        return _ASide(self, good=good)
+
+
+class _ASide(AIter[T]):
+    "An iterator of ``asplit``; resumable as ``_Side`` is."
+
+    __slots__ = ("good", "splitter")
+
+    def __init__(
+        self, splitter: _ASplitter[T], *, good: bool
+    ) -> None:
+        self.splitter = splitter
+        self.good = good
+
+    async def __anext__(self) -> T:
+        splitter = self.splitter
+        async with splitter.cond:
+            v = await splitter.pull(good=self.good)
+            splitter.cond.notify_all()
+        if _Done.is_(v):
+            raise StopAsyncIteration
+        return v
+
+
+async def agather(
+    it: CanAIter[T],
+    by: Fn[[T], K],
+    into: Fn[[Iter[T]], R] | Fold[T, R],
+    *,
+    mode: GatherMode = "adjacent",
+) -> dict[K, R]:
+    "Gather async ``it`` into dict of choice type, as ``gather``."
+    fold: Fold[T, Any] = (
+        into if isinstance(into, Fold) else _APPEND
+    )
+    step, start = fold.step, fold.start
+    missing: Any = object()
+    result: dict[K, Any] = {}
+    key = acc = missing
+    async for v in it:
+        k = by(v)
+        if mode == "hash":
+            acc = result.get(k, missing)
+        elif k != key:
+            key, acc = k, missing
+        acc = start(v) if acc is missing else step(acc, v)
+        result[k] = acc
+
+    if isinstance(into, Fold):
+        return result
+    return {k: into(iter(g)) for k, g in result.items()}
+
+
+def apmap(
+    fn: Fn[[T], Awaitable[R]],
+    it: CanAIter[T],
+    *,
+    limit: int = 8,
+    ordered: bool = True,
+    prefetch: int | None = None,
+) -> AIter[R]:
+    """Map async ``fn`` over async ``it``, ``limit`` at a time.
+
+    As ``pmap``; at most ``prefetch`` (default twice
+    ``limit``) items are read ahead of the consumer. Calls
+    are run by ``limit`` worker tasks, not a task per item.
+    """
+    if prefetch is None:
+        prefetch = 2 * limit
+    if min(limit, prefetch) < 1:
+        msg = "Limit & prefetch must be at least 1."
+        raise ValueError(msg)
+    mapper = _AMapper(fn, aiter(it), prefetch)
+    return mapper.run(limit, ordered=ordered)
+
+
+_Result = tuple[int, R] | BaseException | _Done
+"What ``apmap`` workers pass back to the consumer."
+
+
+class _AMapper(Generic[T, R]):
+    "Shared state behind the async iterator of ``apmap``."
+
+    def __init__(
+        self,
+        fn: Fn[[T], Awaitable[R]],
+        items: AIter[T],
+        prefetch: int,
+    ) -> None:
+        self.fn = fn
+        self.items = items
+        self.indices = count()
+        self.lock = asyncio.Lock()
+        self.slots = asyncio.Semaphore(prefetch)
+        self.results = asyncio.Queue[_Result[R]]()
+
+    async def work(self) -> None:
+        try:
+            while True:
+                await self.slots.acquire()
+                async with self.lock:
+                    v = await anext(self.items, _Done())
+                    i = next(self.indices)
+                if _Done.is_(v):
+                    break
+                await self.results.put((i, await self.fn(v)))
+        except Exception as e:  # noqa: BLE001
+            await self.results.put(e)
+        await self.results.put(_Done())
+
+    async def run(
+        self, n: int, *, ordered: bool
+    ) -> AIter[R]:
+        workers = [
+            asyncio.create_task(self.work())
+            for _ in range(n)
+        ]
+        ahead: dict[int, R] = {}
+        i_next = 0
+        try:
+            while n:
+                result = await self.results.get()
+                if _Done.is_(result):
+                    n -= 1
+                    continue
+                if isinstance(result, BaseException):
+                    raise result
+                i, v = result
+                if not ordered:
+                    self.slots.release()
+                    yield v
+                    continue
+                ahead[i] = v
+                while i_next in ahead:
+                    self.slots.release()
+                    yield ahead.pop(i_next)
+                    i_next += 1
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+
 _Pattern3 = tuple[int, Dots, int]
 _Pattern4 = tuple[int, int, Dots, int]
 _Pattern = _Pattern3 | _Pattern4
@@ -156,3 +2103,184 @@ def irange(stop: int, /) -> range:
 @use_overloads
 def irange() -> None:
     "Inclusive range."
+
+
+# array[int] can't be evaluated before py3.12
+_Ints = MutableSequence[int]
+
+
+class IntervalSet(Set[int]):
+    """Immutable set of ints stored as disjoint intervals.
+
+    Interval bounds are kept in sorted arrays, so membership
+    is O(log n) by bisection, and ``|``, ``&``, ``-`` & ``^``
+    with other interval sets are O(n + m) sweeps. Build from
+    ranges, eg those of ``ii`` or ``irange``::
+
+        s = IntervalSet(ii[1, ..., 5], ii[10, ..., 12])
+        assert 11 in s
+        assert list(s.ranges()) == [
+            range(1, 6),
+            range(10, 13),
+        ]
+    """
+
+    __slots__ = ("_starts", "_stops")
+
+    def __init__(self, *ranges: range) -> None:
+        # each range is a sorted run, so merge them lazily
+        # rather than expand & sort stepped ones
+        runs = map(_range_pairs, ranges)
+        pairs = heapq.merge(*runs)
+        self._starts, self._stops = _coalesce(pairs)
+
+    @classmethod
+    def from_ints(cls, it: CanIter[int]) -> IntervalSet:
+        """Make from (unsorted) ints, eg a stream of IDs.
+
+        Ints are sorted in batches, each kept as intervals, then
+        merged. So peak memory is that of one batch plus the
+        intervals, not a set of every int.
+        """
+        runs = [
+            _coalesce((v, v + 1) for v in sorted(batch))
+            for batch in _batches(it, _RUN_SIZE)
+        ]
+        pairs = heapq.merge(*starmap(zip, runs))
+        return cls._new(_coalesce(pairs))
+
+    @classmethod
+    def _from_iterable(cls, it: CanIter[int]) -> IntervalSet:
+        # as used by the `Set` mixin methods
+        return cls.from_ints(it)
+
+    @classmethod
+    def _new(cls, bounds: Two[_Ints]) -> IntervalSet:
+        new: IntervalSet = cls.__new__(cls)
+        new._starts, new._stops = bounds
+        return new
+
+    def ranges(self) -> Iter[range]:
+        "Iterate intervals, without expanding them."
+        return map(range, self._starts, self._stops)
+
+    def __contains__(self, v: object) -> bool:
+        if not isinstance(v, int):
+            return False
+        i = bisect_right(self._starts, v) - 1
+        return i >= 0 and v < self._stops[i]
+
+    def __iter__(self) -> Iter[int]:
+        return chain.from_iterable(self.ranges())
+
+    def __len__(self) -> int:
+        return sum(self._stops) - sum(self._starts)
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def __repr__(self) -> str:
+        ranges = ", ".join(map(repr, self.ranges()))
+        return f"{type(self).__qualname__}({ranges})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IntervalSet):
+            return (self._starts, self._stops) == (
+                other._starts,
+                other._stops,
+            )
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def _pairs(self) -> Iter[Two[int]]:
+        return zip(self._starts, self._stops)
+
+    def __or__(self, other: Set[Any]) -> IntervalSet:
+        if not isinstance(other, IntervalSet):
+            other = self._from_iterable(other)
+        pairs = heapq.merge(self._pairs(), other._pairs())
+        return self._new(_coalesce(pairs))
+
+    def __and__(self, other: Set[Any]) -> IntervalSet:
+        if not isinstance(other, IntervalSet):
+            # as `Set`, so other may hold non-ints
+            return self._from_iterable(
+                filter(self.__contains__, other)
+            )
+        starts, stops = array("q"), array("q")
+        ours, theirs = self._pairs(), other._pairs()
+        a = next(ours, None)
+        b = next(theirs, None)
+        while a and b:
+            lo, hi = max(a[0], b[0]), min(a[1], b[1])
+            if lo < hi:
+                starts.append(lo)
+                stops.append(hi)
+            if a[1] < b[1]:
+                a = next(ours, None)
+            else:
+                b = next(theirs, None)
+        return self._new((starts, stops))
+
+    def __sub__(self, other: Set[Any]) -> IntervalSet:
+        if not isinstance(other, IntervalSet):
+            ints = (v for v in other if isinstance(v, int))
+            other = self._from_iterable(ints)
+        starts, stops = array("q"), array("q")
+        cuts = other._pairs()
+        cut = next(cuts, None)
+        for lo, hi in self._pairs():
+            # skip cuts wholly before this interval
+            while cut and cut[1] <= lo:
+                cut = next(cuts, None)
+            while cut and cut[0] < hi:
+                if cut[0] > lo:
+                    starts.append(lo)
+                    stops.append(cut[0])
+                lo = max(lo, cut[1])
+                if cut[1] > hi:
+                    break  # may also cut the next interval
+                cut = next(cuts, None)
+            if lo < hi:
+                starts.append(lo)
+                stops.append(hi)
+        return self._new((starts, stops))
+
+    def __xor__(self, other: Set[Any]) -> IntervalSet:
+        if not isinstance(other, IntervalSet):
+            other = self._from_iterable(other)
+        return (self | other) - (self & other)
+
+    def __rsub__(self, other: Set[Any]) -> IntervalSet:
+        return self._from_iterable(other) - self
+
+    # else `Set`'s, which would expand self
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+
+_RUN_SIZE = 2**16
+"Ints ``IntervalSet.from_ints`` sorts at once."
+
+
+def _range_pairs(r: range) -> Iter[Two[int]]:
+    "Ascending ``(start, stop)`` intervals of ``r``."
+    if r.step < 0:
+        r = r[::-1]
+    if r.step == 1:
+        return iter([(r.start, r.stop)] if r else [])
+    return ((v, v + 1) for v in r)
+
+
+def _coalesce(pairs: CanIter[Two[int]]) -> Two[_Ints]:
+    "Merge sorted ``(start, stop)`` pairs into disjoint bounds."
+    starts, stops = array("q"), array("q")
+    for lo, hi in pairs:
+        if stops and lo <= stops[-1]:
+            stops[-1] = max(stops[-1], hi)
+        else:
+            starts.append(lo)
+            stops.append(hi)
+    return starts, stops
@@ -4,28 +4,52 @@ from __future__ import annotations
 
 from abc import abstractmethod
 from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
     Callable,
+    Collection,
+    Hashable,
     Iterable,
     Iterator,
     Mapping,
     Sequence,
 )
-from functools import update_wrapper
-from inspect import get_annotations, signature
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import (
+    lru_cache,
+    partial,
+    reduce,
+    update_wrapper,
+)
+from inspect import (
+    Parameter,
+    Signature,
+    get_annotations,
+    signature,
+)
+from itertools import compress, islice, repeat, tee
+from operator import or_
+from random import randrange
+from reprlib import repr as rrepr
 from types import (
     EllipsisType,
     FunctionType,
     MethodType,
     ModuleType,
+    NoneType,
     TracebackType,
     UnionType,
 )
 from typing import (
+    Annotated,
     Any,
+    ClassVar,
     Concatenate,
     Generic,
     Literal,
     Never,
+    NewType,
     Protocol,
     Self,
     Union,
@@ -33,6 +57,7 @@ from typing import (
     get_args,
     get_origin,
     get_overloads,
+    overload,
 )
 from typing_extensions import (
     ParamSpec,
@@ -40,6 +65,7 @@ from typing_extensions import (
     TypeIs,
     TypeVar,
 )
+from weakref import WeakValueDictionary
 
 P = ParamSpec("P", default=...)
 R = TypeVar("R", default=object)
@@ -72,6 +98,8 @@ NOTE: isn't complete & may be impossible to do so.
 # `iter` func really should return `Iter`.
 Iter = Iterator[V]  #:
 CanIter = Iterable[V]  #:
+AIter = AsyncIterator[V]  #:
+CanAIter = AsyncIterable[V]  #:
 
 # EllipsisType is bad since it suggests type of `type(...)`
 # but we can't use Ellipsis since that's a built-in alias
@@ -95,6 +123,37 @@ class ParamsCopier(Protocol[P]):
     def __call__(self, f: Fn[..., R], /) -> Fn[P, R]: ...
 
 
+class _LazySignature(Signature):
+    "Signature of ``f``; only worked out when first used."
+
+    __slots__ = ("_f",)
+
+    def __init__(
+        self,
+        parameters: Seq[Parameter] | None = None,
+        *,
+        _source: Fn | None = None,
+        **kwds: Any,
+    ) -> None:
+        # keeps `Signature`'s params, as used by `replace` etc
+        if _source is None:
+            super().__init__(parameters, **kwds)
+        else:
+            self._f = _source
+
+    def __getattr__(self, name: str) -> object:
+        # Only called for unset slots, as on first use.
+        if name not in {"_parameters", "_return_annotation"}:
+            raise AttributeError(name)
+        sig = signature(self._f)
+        super().__init__(
+            list(sig.parameters.values()),
+            return_annotation=sig.return_annotation,
+            __validate_parameters__=False,
+        )
+        return getattr(self, name)
+
+
 def copy_params(f: Fn[P, object], /) -> ParamsCopier[P]:
     """Transfer static signature of one func to another.
 
@@ -109,10 +168,13 @@ def copy_params(f: Fn[P, object], /) -> ParamsCopier[P]:
         @copy_params(range)
         def sum_range(*args, **kwds) -> int:
             return sum(range(*args, **kwds))
+
+    The signature is only worked out when first inspected,
+    so decorating is cheap.
     """
 
     def decorator(g: Fn[..., R]) -> Fn[P, R]:
-        g.__signature__ = signature(f)  # type: ignore[attr-defined]
+        g.__signature__ = _LazySignature(_source=f)  # type: ignore[attr-defined]
         g.__annotations__ = get_annotations(f)
         return g
 
@@ -125,56 +187,261 @@ def copy_type(v: T, /) -> Fn[[object], T]:
     return lambda x: cast(T, x)
 
 
-def _match_overload(
-    f: Fn, args: tuple[object, ...], kwds: StrDict
-) -> tuple[Fn, tuple, StrDict[Any]]:
-    # TODO: add runtime type-checking?
+@dataclass(frozen=True, slots=True)
+class _Overload:
+    "An overload matched to a call shape."
+
+    func: Fn
+    moved: tuple[str, ...]
+    "Keyword args the overload binds positionally."
+    checks: tuple[Fn[[object], bool], ...] = ()
+    "Type checks for each of the call's args, in order."
+    by_type: bool = True
+    "Whether ``checks`` depend only on the args' types."
+
+
+class _Dispatcher:
+    """Pre-compiled overload lookup for ``f``.
+
+    Whether ``Signature.bind`` succeeds depends only on the
+    shape of a call; the number of positional args and the
+    keyword names. So each shape is bound once & cached.
+
+    With ``by_types``, overloads binding the shape are also
+    checked against the args in turn, and the winner cached
+    per tuple of arg types when this is sound.
+    """
+
+    def __init__(
+        self,
+        f: Fn,
+        maxsize: int = 256,
+        *,
+        by_types: bool = False,
+    ) -> None:
+        self.f = f
+        self.by_types = by_types
+        self.overloads: Seq[Fn] = []
+        self.sigs: list[tuple[Fn, Signature]] = []
+        self.match = lru_cache(maxsize)(self._match)
+        self.resolved: dict[tuple, _Overload] = {}
+
+    def refresh(self) -> None:
+        "Rebuild the table if ``f``'s overloads changed."
+        overloads = get_overloads(self.f)
+        if overloads == self.overloads:
+            return
+        self.overloads = overloads
+        self.sigs = [(o, signature(o)) for o in overloads]
+        self.match.cache_clear()
+        self.resolved.clear()
+
+    def _match(
+        self, n: int, names: tuple[str, ...]
+    ) -> list[_Overload]:
+        matches = []
+        for func_overload, s in self.sigs:
+            # Bind markers so the result shows which keyword
+            # args the overload takes positionally.
+            try:
+                bound = s.bind(
+                    *range(n), **dict(zip(names, names))
+                )
+            except TypeError:
+                continue
+            moved = tuple(
+                a for a in bound.args if isinstance(a, str)
+            )
+            if not self.by_types:
+                return [_Overload(func_overload, moved)]
+
+            hints = get_hints(func_overload)
+            arg_hints: dict[int | str, Hint] = {}
+            for name, markers in bound.arguments.items():
+                kind = s.parameters[name].kind
+                if kind is kind.VAR_KEYWORD:
+                    markers = markers.values()
+                elif kind is not kind.VAR_POSITIONAL:
+                    markers = (markers,)
+                for marker in markers:
+                    arg_hints[marker] = hints.get(
+                        name, object
+                    )
+            ordered = [
+                arg_hints[i] for i in (*range(n), *names)
+            ]
+            checks = tuple(
+                Check[h].has_instance  # type: ignore[valid-type]
+                for h in ordered
+            )
+            by_type = all(map(_is_class_hint, ordered))
+            matches.append(
+                _Overload(
+                    func_overload, moved, checks, by_type
+                )
+            )
+        return matches
+
+    def resolve(
+        self, args: tuple[object, ...], kwds: StrDict
+    ) -> _Overload | None:
+        "Get the first overload ``f(*args, **kwds)`` matches."
+        self.refresh()
+        names = tuple(kwds)
+        matches = self.match(len(args), names)
+        if not self.by_types:
+            return matches[0] if matches else None
+
+        values = (*args, *kwds.values())
+        key = (names, *map(type, values))
+        if (match := self.resolved.get(key)) is not None:
+            return match
+
+        cacheable = True
+        for match in matches:
+            cacheable = cacheable and match.by_type
+            checks = zip(match.checks, values)
+            if all(check(v) for check, v in checks):
+                if cacheable:
+                    self.resolved[key] = match
+                return match
+        return None
+
+    def __call__(
+        self, args: tuple[object, ...], kwds: StrDict
+    ) -> tuple[Fn, tuple, StrDict[Any]]:
+        match = self.resolve(args, kwds)
+        if match is None:
+            name = (
+                f"{self.f.__module__}.{self.f.__qualname__}"
+            )
+            msg = f"No overload of {name} for {args=}, {kwds=}."
+            raise TypeError(msg)
 
-    for func_overload in get_overloads(f):
-        s = signature(func_overload)
-        try:
-            bound = s.bind(*args, **kwds)
-        except TypeError:
-            continue
         # TODO: don't we need to call apply_defaults?
         # Add test case.
-        return func_overload, bound.args, bound.kwargs
-    name = f"{f.__module__}.{f.__qualname__}"
-    msg = f"No overload of {name} for {args=}, {kwds=}."
-    raise TypeError(msg)
+        if match.moved:
+            kwds = kwds.copy()
+            args = (
+                *args,
+                *(kwds.pop(k) for k in match.moved),
+            )
+        return match.func, args, kwds
 
 
 def check_overloads(f: Fn[P, R], /) -> Fn[P, R]:
     "Check calls to ``f`` match an overload signatures."
+    match_overload = _Dispatcher(f)
 
     def new_func(*args: P.args, **kwds: P.kwargs) -> R:
-        _, args, kwds = _match_overload(f, args, kwds)
+        _, args, kwds = match_overload(args, kwds)
         return f(*args, **kwds)
 
     update_wrapper(new_func, f)
     return new_func
 
 
+_Impl = Fn[[], None] | MethodDef[No, [], None]
+
+
+@overload
+def use_overloads(f: _Impl, /) -> Fn: ...
+@overload
+def use_overloads(
+    *, dispatch: Literal["shape", "types"] = ...
+) -> Fn[[_Impl], Fn]: ...
 def use_overloads(
-    f: Fn[[], None] | MethodDef[No, [], None], /
+    f: _Impl | None = None,
+    /,
+    *,
+    dispatch: Literal["shape", "types"] = "shape",
 ) -> Fn:
     """Use ``@overload`` bodies to implement of ``f``.
 
-    No (runtime) types checked, so signatures should not
-    overlap even after stripping type hints.
+    By default no (runtime) types checked, so signatures
+    should not overlap even after stripping type hints.
+    Overloads are matched once per call shape, then looked
+    up.
+
+    With ``dispatch="types"`` the first overload whose
+    hints ``Check`` out against the args is used, so
+    signatures may overlap. Matches are cached per tuple of
+    arg types where hints are plain classes.
     """
+    if f is None:
+        return partial(use_overloads, dispatch=dispatch)
+
+    by_types = dispatch == "types"
+    match_overload = _Dispatcher(f, by_types=by_types)
 
     def new_func(*args: object, **kwds: object) -> object:
-        ofunc, args, kwds = _match_overload(f, args, kwds)
+        ofunc, args, kwds = match_overload(args, kwds)
         return ofunc(*args, **kwds)
 
     update_wrapper(new_func, f)
     return new_func
 
 
-def get_hints(v: Fn | type | Module) -> dict[str, Hint]:
-    "Get a func/class/module's type-hints."
-    return get_annotations(v, eval_str=True)
+_Hints = dict[str, Hint]
+_HINTS_ATTR = "_jamjam_hints"
+"Where hints are cached on the hinted object itself."
+# Not a weak-keyed dict, as hints often refer back to their
+# object, so the values would keep the keys alive.
+
+
+def _raw_annotations(v: object) -> object:
+    if isinstance(v, type):  # don't look at base classes
+        return v.__dict__.get("__annotations__")
+    return getattr(v, "__annotations__", None)
+
+
+def _cached_hints(v: object) -> tuple[object, _Hints] | None:
+    # from vars, as classes would see their bases' caches
+    try:
+        return vars(v).get(_HINTS_ATTR)
+    except TypeError:  # no __dict__, eg builtins
+        return None
+
+
+def _cache_hints(v: object, hints: _Hints) -> _Hints:
+    # The likes of builtins can't take new attributes.
+    with suppress(AttributeError, TypeError):
+        setattr(v, _HINTS_ATTR, (_raw_annotations(v), hints))
+    return hints.copy()
+
+
+def get_hints(v: Fn | type | Module) -> _Hints:
+    """Get a func/class/module's type-hints.
+
+    Cached until ``v.__annotations__`` is reassigned.
+    """
+    cached = _cached_hints(v)
+    if cached is not None:
+        cached_raw, hints = cached
+        if cached_raw is _raw_annotations(v):
+            return hints.copy()
+    hints = get_annotations(v, eval_str=True)
+    return _cache_hints(v, hints)
+
+
+def get_hints_many(m: Module) -> dict[str, _Hints]:
+    """Get hints for all of a module's classes & functions.
+
+    Resolves them in one pass with one snapshot of the
+    module's globals; this also primes ``get_hints``.
+    """
+    scope = dict(vars(m))
+    result: dict[str, _Hints] = {}
+    for name, v in scope.items():
+        if not isinstance(v, type | FunctionType):
+            continue
+        if v.__module__ != m.__name__:
+            continue  # imported
+        hints = get_annotations(
+            v, globals=scope, eval_str=True
+        )
+        result[name] = _cache_hints(v, hints)
+    return result
 
 
 class _Delete:
@@ -190,6 +457,7 @@ def typing_only(_: MethodDef[T, P, R]) -> MethodDef[T, P, R]:
 
 
 _no_hint: Any = object()
+_aliases = WeakValueDictionary[tuple[type, object], Any]()
 
 
 class HintWrap(Generic[T]):
@@ -226,39 +494,388 @@ class HintWrap(Generic[T]):
         if isinstance(item, tuple):
             msg = "Only one type parameter allowed."
             raise TypeError(msg)
-        return type("HintAlias", (cls,), {}, _hint=item)
+
+        # Interned as creating classes is slow. Equal hints,
+        # like ``int | str`` & ``Union[str, int]``, share.
+        key = (cls, item)
+        try:
+            return _aliases[key]
+        except KeyError:
+            hashable = True
+        except TypeError:
+            hashable = False
+
+        alias = type("HintAlias", (cls,), {}, _hint=item)
+        if hashable:
+            _aliases[key] = alias
+        return alias
 
 
-def _extended_isinstance(obj: object, hint: Hint) -> bool:
+def _hint_classes(hint: Hint) -> tuple[type, ...] | None:
+    "Get classes if ``hint`` is one or a union of them."
+    while (real := _resolve(hint)) is not hint:
+        hint = real
     if isinstance(hint, type):
-        return isinstance(obj, hint)
-    if isinstance(hint, UnionType):
-        result = any(
-            _extended_isinstance(obj, sub_hint)
-            for sub_hint in get_args(hint)
-        )
+        return (hint,)
+    if (
+        isinstance(hint, UnionType)
+        or get_origin(hint) is Union
+    ):
+        classes: tuple[type, ...] = ()
+        for sub_hint in get_args(hint):
+            sub_classes = _hint_classes(sub_hint)
+            if sub_classes is None:
+                return None
+            classes += sub_classes
+        return classes
+    return None
+
+
+def _is_class_hint(hint: Hint) -> bool:
+    "Check if instances of ``hint`` depend only on type."
+    return _hint_classes(hint) is not None
+
+
+_MEMO_SIZE = 256
+"Max types a ``_TypeMemo`` holds before it's reset."
+
+
+# Subclass dict, not UserDict, so look ups stay in C.
+class _TypeMemo(dict[type, bool]):  # noqa: FURB189
+    "Memo of whether a type's instances are of ``classes``."
+
+    def __init__(self, classes: tuple[type, ...]) -> None:
+        self.classes = classes
+
+    def __missing__(self, t: type) -> bool:
+        # bounded, so (eg dynamic) types checked aren't kept
+        if len(self) >= _MEMO_SIZE:
+            self.clear()
+        self[t] = result = issubclass(t, self.classes)
         return result
 
-    origin = get_origin(hint)
-    if origin is Literal:
-        return obj in get_args(hint)
-    if origin is Union:
-        result = any(
-            _extended_isinstance(obj, sub_hint)
-            for sub_hint in get_args(hint)
+
+_Checker = Fn[[object], bool]
+_Pick = Fn[[Iterable], Iterable]
+_CHECKERS = 1024
+"Max hints ``_compile`` keeps checkers for."
+_SAMPLES = 3
+"Number of random items checked by sampling checkers."
+
+
+def _always(_: object) -> bool:
+    return True
+
+
+def _every(obj: Iterable) -> Iterable:
+    return obj
+
+
+def _sample(obj: Iterable) -> Iterable:
+    if not isinstance(obj, Sequence):
+        return islice(obj, _SAMPLES + 2)
+    n = len(obj)
+    if n <= _SAMPLES + 2:
+        return obj
+    picks = [0, n - 1]
+    picks += (randrange(n) for _ in range(_SAMPLES))
+    return map(obj.__getitem__, picks)
+
+
+def _compile(hint: Hint, pick: _Pick = _every) -> _Checker:
+    """Get the (cached) checker specialized to ``hint``.
+
+    ``pick`` chooses which items of containers are checked.
+    With ``_sample`` that's the first, last and a few random
+    items, so checks are O(1) for sequences.
+    """
+    try:
+        hash(hint)
+    except TypeError:  # unhashable; eg Annotated metadata
+        return _compile_new(hint, pick)
+    return _compile_cached(cast(Hashable, hint), pick)
+
+
+@lru_cache(_CHECKERS)  # bounded, so hints aren't all kept
+def _compile_cached(hint: Hashable, pick: _Pick) -> _Checker:
+    return _compile_new(cast(Hint, hint), pick)
+
+
+def _compile_any_of(
+    hints: Iterable[Hint], pick: _Pick
+) -> _Checker:
+    classes: list[type] = []
+    checks: list[_Checker] = []
+    for hint in hints:
+        if hint is Any or hint is object:
+            return _always
+        if isinstance(hint, type):
+            classes.append(hint)
+        else:
+            checks.append(_compile(hint, pick))
+
+    if classes:
+        # one isinstance call covers every plain class
+        types = tuple(classes)
+        checks.insert(0, lambda obj: isinstance(obj, types))
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(obj: object) -> bool:
+        return any(check(obj) for check in checks)
+
+    return check
+
+
+def _compile_literal(values: frozenset) -> _Checker:
+    def check(obj: object) -> bool:
+        try:
+            return obj in values
+        except TypeError:  # unhashable so can't be a value
+            return False
+
+    return check
+
+
+def _compile_tuple(
+    args: tuple[Any, ...], pick: _Pick
+) -> _Checker:
+    if len(args) == 2 and args[1] is ...:
+        return _compile_items(tuple, args[0], pick)
+
+    n = len(args)
+    checks = tuple(_compile(a, pick) for a in args)
+
+    def check(obj: object) -> bool:
+        if not isinstance(obj, tuple) or len(obj) != n:
+            return False
+        return all(check(v) for check, v in zip(checks, obj))
+
+    return check
+
+
+def _compile_items(
+    origin: type, hint: Hint, pick: _Pick
+) -> _Checker:
+    check_item = _compile(hint, pick)
+    if check_item is _always:
+        return lambda obj: isinstance(obj, origin)
+    if isinstance(hint, type):
+        # keep the loop over plain classes in C
+        return lambda obj: isinstance(obj, origin) and all(
+            map(
+                isinstance,
+                pick(cast(Iterable, obj)),
+                repeat(hint),
+            )
         )
-        return result
 
+    def check(obj: object) -> bool:
+        if not isinstance(obj, origin):
+            return False
+        return all(
+            map(check_item, pick(cast(Iterable, obj)))
+        )
+
+    return check
+
+
+def _compile_mapping(
+    origin: type, k_hint: Hint, v_hint: Hint, pick: _Pick
+) -> _Checker:
+    check_k = _compile(k_hint, pick)
+    check_v = _compile(v_hint, pick)
+
+    def check(obj: object) -> bool:
+        if not isinstance(obj, origin):
+            return False
+        for k, v in pick(cast(Mapping, obj).items()):
+            if not (check_k(k) and check_v(v)):
+                return False
+        return True
+
+    return check
+
+
+def _compile_unsupported(hint: Hint) -> _Checker:
     msg = f"Type-hint {hint} is not supported."
-    raise NotImplementedError(msg)
+
+    def check(_: object) -> bool:
+        raise NotImplementedError(msg)
+
+    return check
+
+
+def _resolve(hint: Any) -> Any:
+    "Replace hints which stand in for another."
+    real: Any
+    if hint is Any:
+        real = object
+    elif hint is None:
+        real = NoneType
+    elif isinstance(hint, TypeAliasType):
+        real = hint.__value__
+    elif isinstance(hint, NewType):
+        real = hint.__supertype__
+    elif isinstance(hint, TypeVar):
+        constraints = hint.__constraints__
+        bound = hint.__bound__ or object
+        real = (
+            reduce(or_, constraints)
+            if constraints
+            else bound
+        )
+    elif get_origin(hint) is Annotated:
+        real = get_args(hint)[0]
+    else:
+        real = hint
+    return real
+
+
+def _compile_new(hint: Any, pick: _Pick) -> _Checker:
+    if (real := _resolve(hint)) is not hint:
+        return _compile(real, pick)
+    if isinstance(hint, type):
+        return _compile_any_of([hint], pick)
+
+    origin = get_origin(hint)
+    args = get_args(hint)
+    if isinstance(hint, UnionType) or origin is Union:
+        return _compile_any_of(args, pick)
+    if origin is Literal:
+        return _compile_literal(frozenset(args))
+    if isinstance(origin, type):
+        return _compile_generic(origin, args, pick)
+    return _compile_unsupported(hint)
+
+
+def _compile_generic(
+    origin: type, args: tuple[Any, ...], pick: _Pick
+) -> _Checker:
+    if origin is tuple:
+        return _compile_tuple(args, pick)
+    if issubclass(origin, Mapping) and len(args) == 2:
+        return _compile_mapping(origin, *args, pick)
+    if issubclass(origin, Collection) and len(args) == 1:
+        return _compile_items(origin, args[0], pick)
+    if origin is type and isinstance(args[0], type):
+        cls = args[0]
+        return lambda obj: (
+            isinstance(obj, type) and issubclass(obj, cls)
+        )
+    # eg ``Iterator[T]``; items can't be checked safely
+    return lambda obj: isinstance(obj, origin)
+
+
+def _parts(
+    obj: Any, origin: type, args: tuple[Any, ...]
+) -> Iterable[tuple[str, object, Any]]:
+    "Yield parts of ``obj`` with their paths & hints."
+    if origin is tuple and args[-1:] != (...,):
+        if len(obj) == len(args):
+            for i, (v, hint) in enumerate(zip(obj, args)):
+                yield f"[{i}]", v, hint
+    elif issubclass(origin, Mapping) and len(args) == 2:
+        k_hint, v_hint = args
+        for k, v in obj.items():
+            yield ".keys()", k, k_hint
+            yield f"[{k!r}]", v, v_hint
+    elif issubclass(origin, Collection) and args:
+        for i, v in enumerate(obj):
+            yield f"[{i}]", v, args[0]
+
+
+def _find_fault(
+    obj: object, hint: Hint, path: str = "obj"
+) -> tuple[str, object, Hint]:
+    "Locate the innermost part of ``obj`` failing ``hint``."
+    while (real := _resolve(hint)) is not hint:
+        hint = real
+    origin = get_origin(hint)
+    if isinstance(origin, type) and isinstance(obj, origin):
+        for part, v, sub_hint in _parts(
+            obj, origin, get_args(hint)
+        ):
+            if not _compile(sub_hint)(v):
+                return _find_fault(v, sub_hint, path + part)
+    return path, obj, hint
 
 
 class Check(HintWrap[T]):
     "Generalized isinstance checks."
 
-    # TODO: generalize this to include 3 modes: stingy,
-    # generous and fail.
+    _check: ClassVar[_Checker] = staticmethod(
+        _compile_unsupported(_no_hint)
+    )
+    _check_sample: ClassVar[_Checker] = _check
+
+    _memo: ClassVar[_TypeMemo | None] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        check = _compile(cls._hint)
+        sample = _compile(cls._hint, _sample)
+        cls._check = staticmethod(check)
+        cls._check_sample = staticmethod(sample)
+        classes = _hint_classes(cls._hint)
+        if classes is not None:
+            cls._memo = _TypeMemo(classes)
+
+    @classmethod
+    def has_instance(
+        cls,
+        obj: object,
+        mode: Literal["full", "sample", "fail"] = "full",
+    ) -> TypeIs[T]:
+        """Check if ``obj`` is an instance of ``T``.
+
+        Each hint is compiled once to a specialized checker.
+        The ``mode`` sets how containers are checked:
+
+        * ``"full"`` checks every item.
+        * ``"sample"`` checks the first, last & a few random
+          items; O(1) for sequences but may miss bad items.
+        * ``"fail"`` checks every item & raises a
+          ``TypeError`` giving the path to the first bad one.
+        """
+        if mode == "sample":
+            return cls._check_sample(obj)
+        passed = cls._check(obj)
+        if passed or mode == "full":
+            return passed
+
+        path, v, hint = _find_fault(obj, cls._hint)
+        msg = f"Check failed at {path}: {rrepr(v)} is not {hint}."
+        raise TypeError(msg)
+
+    @classmethod
+    def _flags(cls, it: CanIter[object]) -> Iter[bool]:
+        # With a plain class hint, the check per item is a
+        # memo look up of it's type; all done in C.
+        if cls._memo is None:
+            return map(cls._check, it)
+        return map(cls._memo.__getitem__, map(type, it))
+
+    @classmethod
+    def mask(cls, it: CanIter[object]) -> list[bool]:
+        "Check if each item of ``it`` is an instance of ``T``."
+        return list(cls._flags(it))
+
+    @classmethod
+    def filter(cls, it: CanIter[object]) -> Iter[T]:
+        "Lazily get items of ``it`` that are instances of ``T``."
+        items, to_check = tee(it)
+        goods = compress(items, cls._flags(to_check))
+        return cast(Iter[T], goods)
+
     @classmethod
-    def has_instance(cls, obj: object) -> TypeIs[T]:
-        "Check if ``obj`` is an instance of ``T``."
-        return _extended_isinstance(obj, cls._hint)
+    def partition(
+        cls, it: CanIter[object]
+    ) -> tuple[Iter[T], Iter[object]]:
+        "Split ``it`` by being instances of ``T`` or not."
+        # local import as `jamjam.iter` depends on this module
+        from jamjam.iter import split_by  # noqa: PLC0415
+
+        items, to_check = tee(it)
+        goods, bads = split_by(items, cls._flags(to_check))
+        return cast(Iter[T], goods), bads
@@ -29,11 +29,11 @@ from ctypes.wintypes import (
     WPARAM,
 )
 from functools import wraps
-from inspect import signature
-from typing import Annotated, ParamSpec, TypeVar, cast
+from inspect import Signature, signature
+from typing import Annotated, Any, ParamSpec, TypeVar, cast
 
 from jamjam import c
-from jamjam.typing import MethodDef
+from jamjam.typing import Fn, MethodDef, get_hints
 
 P = ParamSpec("P")
 T = TypeVar("T")
@@ -157,22 +157,36 @@ def _errcheck(
     return result
 
 
+_CSpec = tuple[Signature, list[Any], Any]
+"Signature (less ``self``), arg & return C types of a method."
+
+
+def _c_spec(f: Fn) -> _CSpec:
+    sig = signature(f)
+    _, *params = sig.parameters.values()
+    hints = get_hints(f)
+    argtypes = [c.extract(hints[p.name]) for p in params]
+    restype = c.extract(hints["return"])
+    return sig.replace(parameters=params), argtypes, restype
+
+
 def _imp_method(f: MethodDef[D, P, R]) -> MethodDef[D, P, R]:
     "Implement a WinDLL method from it's name & typing."
     method_name = f.__name__
+    spec: _CSpec | None = None
 
     @wraps(f)
     def new_method_defn(
         self: D, /, *args: P.args, **kwargs: P.kwargs
     ) -> R:
-        cfunc = self[method_name]
-        method = getattr(self, method_name)
-        sig = signature(method, eval_str=True)
-        params = sig.parameters.values()
-        argtypes = [c.extract(p.annotation) for p in params]
+        nonlocal spec
+        if spec is None:  # worked out on first call only
+            spec = _c_spec(f)
+        sig, argtypes, restype = spec
 
+        cfunc = self[method_name]
         cfunc.argtypes = argtypes
-        cfunc.restype = c.extract(sig.return_annotation)
+        cfunc.restype = restype
         cfunc.errcheck = _errcheck
 
         bound = sig.bind(*args, **kwargs)
@@ -1,4 +1,52 @@
-from jamjam.iter import ii, split
+import asyncio
+import hashlib
+import heapq
+import random
+import time
+import tracemalloc
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, count, islice
+from operator import itemgetter, neg
+from timeit import timeit
+from typing import Any
+
+from pytest import importorskip, raises
+
+from jamjam._testing import manual_only
+from jamjam.iter import (
+    Fold,
+    IntervalSet,
+    OrderedSet,
+    QuantileSketch,
+    afirst,
+    agather,
+    apmap,
+    asplit,
+    batched,
+    chunked,
+    classify,
+    gather,
+    gather_external,
+    ii,
+    irange,
+    merge_sorted,
+    pmap,
+    prefetch,
+    replayable,
+    reservoir,
+    rolling_max,
+    rolling_mean,
+    rolling_min,
+    rolling_sum,
+    split,
+    split_by,
+    top_k,
+    unique,
+    windowed,
+)
+from jamjam.typing import AIter, Fn, Iter, Two
 
 
 def test_split() -> None:
@@ -11,6 +59,929 @@ def test_split() -> None:
     assert list(falsy) == [0, False, ""]
 
 
+def test_split_bounded() -> None:
+    even, odd = split(range(10), is_even, max_buffer=2)
+    read: list[int] = []
+    with raises(BufferError):
+        read.extend(even)
+    # resumes once the other side is read
+    assert list(odd) == [1, 3, 5, 7, 9]
+    assert [*read, *even] == [0, 2, 4, 6, 8]
+
+    odd, even = split(
+        range(100),
+        lambda x: x % 2,
+        max_buffer=3,
+        overflow="spill",
+    )
+    assert list(odd) == list(range(1, 100, 2))
+    assert list(even) == list(range(0, 100, 2))
+
+    odd, even = split(
+        range(1000),
+        lambda x: x % 2,
+        max_buffer=3,
+        overflow="block",
+    )
+    with ThreadPoolExecutor() as executor:
+        odds = executor.submit(list, odd)
+        assert list(even) == list(range(0, 1000, 2))
+    assert odds.result() == list(range(1, 1000, 2))
+
+
+def test_classify() -> None:
+    by3 = classify(range(30), lambda x: x % 3, range(3))
+    assert [list(it) for it in by3.values()] == [
+        [*range(0, 30, 3)],
+        [*range(1, 30, 3)],
+        [*range(2, 30, 3)],
+    ]
+
+    words = ["ant", "bee", "cat", "ape", "cow", "bat"]
+    by_letter = classify(words, itemgetter(0), "abc")
+    assert next(by_letter["c"]) == "cat"
+    assert next(by_letter["a"]) == "ant"
+    assert list(by_letter["b"]) == ["bee", "bat"]
+    assert list(by_letter["a"]) == ["ape"]
+    assert list(by_letter["c"]) == ["cow"]
+
+    with raises(KeyError, match="'d' is not one of"):
+        list(classify(["d"], itemgetter(0), "abc")["a"])
+
+    by3 = classify(
+        range(30), lambda x: x % 3, range(3), max_buffer=2
+    )
+    with raises(BufferError):
+        list(by3[0])
+    # the item that overflowed is kept, not lost
+    assert list(islice(by3[1], 3)) == [1, 4, 7]
+
+    by3 = classify(
+        range(300),
+        lambda x: x % 3,
+        range(3),
+        max_buffer=2,
+        overflow="spill",
+    )
+    assert [list(by3[k]) for k in (2, 1, 0)] == [
+        [*range(2, 300, 3)],
+        [*range(1, 300, 3)],
+        [*range(0, 300, 3)],
+    ]
+
+
+@manual_only
+def test_classify_speed() -> None:
+    def mod_is(k: int, i: int) -> Fn[[int], bool]:
+        return lambda x: x % k == i
+
+    def chained(k: int) -> None:
+        rest: Iter[int] = iter(range(10**5))
+        for i in range(k - 1):
+            ours, rest = split(rest, mod_is(k, i))
+            deque(ours, maxlen=0)
+        deque(rest, maxlen=0)
+
+    def classified(k: int) -> None:
+        its = classify(
+            range(10**5), lambda x: x % k, range(k)
+        )
+        for it in its.values():
+            deque(it, maxlen=0)
+
+    t1 = timeit(lambda: chained(10), number=5)
+    t2 = timeit(lambda: classified(10), number=5)
+    assert t1 / t2 > 3
+
+
+@manual_only
+def test_split_speed() -> None:
+    def run(**kwds: Any) -> None:
+        odds, evens = split(range(10**6), is_even, **kwds)
+        deque(odds, maxlen=0)
+        deque(evens, maxlen=0)
+
+    t1 = timeit(lambda: run(max_buffer=10**6), number=3)
+    t2 = timeit(run, number=3)
+    assert t1 / t2 > 1.5
+
+
+@manual_only
+def test_split_memory() -> None:
+    def peak(skew: int, **kwds: Any) -> int:
+        tracemalloc.start()
+        first, second = split(
+            range(10**5), lambda x: x % 100 < skew, **kwds
+        )
+        deque(first, maxlen=0)
+        deque(second, maxlen=0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    for skew in (10, 50, 90):
+        unbounded = peak(skew)
+        bounded = peak(
+            skew, max_buffer=100, overflow="spill"
+        )
+        assert unbounded > 20 * bounded
+
+
+def test_split_by() -> None:
+    goods, bads = split_by("abcd", [1, 0, 0, 1])
+    assert list(bads) == ["b", "c"]
+    assert list(goods) == ["a", "d"]
+
+
+def test_gather() -> None:
+    words = ["apple", "bean", "avocado", "bread", "cake"]
+    by = itemgetter(0)
+    assert gather(words, by, list) == {
+        "a": ["avocado"],
+        "b": ["bread"],
+        "c": ["cake"],
+    }
+    assert gather(words, by, list, mode="hash") == {
+        "a": ["apple", "avocado"],
+        "b": ["bean", "bread"],
+        "c": ["cake"],
+    }
+    assert gather(words, by, Fold.count(), mode="hash") == {
+        "a": 2,
+        "b": 2,
+        "c": 1,
+    }
+    assert gather(words, len, Fold.last(), mode="hash") == {
+        5: "bread",
+        4: "cake",
+        7: "avocado",
+    }
+    assert gather(range(10), is_even, Fold.sum()) == {
+        True: 8,
+        False: 9,
+    }
+
+    lengths = Fold[str, int](lambda n, s: n + len(s), len)
+    got = gather(words, by, lengths, mode="hash")
+    assert got == {"a": 12, "b": 9, "c": 4}
+
+    assert (
+        gather(words, by, Fold.min(), mode="hash")["a"]
+        == "apple"
+    )
+    assert (
+        gather(words, by, Fold.max(), mode="hash")["b"]
+        == "bread"
+    )
+    assert (
+        gather(words, by, Fold.first(), mode="hash")["b"]
+        == "bean"
+    )
+
+
+def test_gather_external() -> None:
+    items = [random.randrange(50) for _ in range(1000)]
+    expected = gather(
+        sorted(items, key=is_even), is_even, list
+    )
+    got = gather_external(
+        items, is_even, list, memory_limit=64
+    )
+    assert got == expected
+    assert gather_external(items, is_even, list) == expected
+
+    counts = gather_external(
+        items, str, Fold.count(), memory_limit=10
+    )
+    assert counts == Counter(map(str, items))
+    for limit in (0, -1):
+        with raises(ValueError, match="at least 1"):
+            gather_external(
+                items, str, list, memory_limit=limit
+            )
+
+
+def is_even(x: int) -> bool:
+    return x % 2 == 0
+
+
+def test_gather_workers() -> None:
+    items = [random.randrange(50) for _ in range(1000)]
+    intos: list[Any] = [Fold.sum(), Fold.last(), list]
+    for into in intos:
+        expected = gather(items, str, into, mode="hash")
+        got = gather(
+            items,
+            str,
+            into,
+            mode="hash",
+            workers=2,
+            chunk_size=64,
+        )
+        assert got == expected
+
+    with raises(ValueError, match="hash mode"):
+        gather(items, str, list, workers=2)
+    with raises(ValueError, match="Chunk size"):
+        gather(
+            items,
+            str,
+            list,
+            mode="hash",
+            chunk_size=0,
+            workers=2,
+        )
+    with raises(ValueError, match="Workers"):
+        gather(items, str, list, mode="hash", workers=0)
+    lengths = Fold[str, int](lambda n, s: n + len(s), len)
+    with raises(ValueError, match="needs a merge"):
+        gather(["a"], len, lengths, mode="hash", workers=2)
+
+
+def test_gather_numpy() -> None:
+    np = importorskip("numpy")
+    data = np.array([
+        random.randrange(50) for _ in range(1000)
+    ])
+    intos: list[Any] = [
+        *(Fold.count(), Fold.sum(), Fold.min(), Fold.max()),
+        *(Fold.first(), Fold.last(), list, sorted),
+    ]
+    for mode in ("adjacent", "hash"):
+        for into in intos:
+            expected = gather(
+                data.tolist(), is_even, into, mode=mode
+            )
+            got = gather(
+                data,
+                is_even,
+                into,
+                mode=mode,
+                vectorized=True,
+            )
+            assert got == expected
+            assert list(got) == list(expected)
+    runs = gather(np.array([1, 1, 2, 1]), np.negative, list)
+    assert runs == {-1: [1], -2: [2]}
+    assert gather(np.array([]), np.negative, list) == {}
+    # groups are still given as iterators
+    firsts = gather(np.array([1, 1, 2]), np.negative, next)
+    assert firsts == {-1: 1, -2: 2}
+    assert gather(np.array([1, 1, 2]), neg, next) == firsts
+    # other callables are applied per item
+    floats = np.array([1.0, 2.5])
+    whole = gather(floats, lambda x: x.is_integer(), list)
+    assert whole == {True: [1.0], False: [2.5]}
+    with raises(ValueError, match="1 value per item"):
+        gather(data, str, list, vectorized=True)
+
+
+def test_split_numpy() -> None:
+    np = importorskip("numpy")
+    data = np.arange(10)
+    evens, odds = split(data, is_even, vectorized=True)
+    assert list(evens) == [0, 2, 4, 6, 8]
+    assert list(odds) == [1, 3, 5, 7, 9]
+    trues, falses = split(data)
+    assert list(trues) == list(range(1, 10))
+    assert list(falses) == [0]
+    small, big = split_by(data, data < 3)
+    assert list(small) == [0, 1, 2]
+    assert len(list(big)) == 7
+    pos, zero = split(data, np.sign)
+    assert list(pos) == list(range(1, 10))
+    assert list(zero) == [0]
+    # other callables are applied per item
+    floats = np.array([1.0, 2.5])
+    whole, _ = split(floats, lambda x: x.is_integer())
+    assert list(whole) == [1.0]
+
+
+@manual_only
+def test_gather_numpy_speed() -> None:
+    np = importorskip("numpy")
+    data = np.random.default_rng().integers(1000, size=10**6)
+    items = data.tolist()
+
+    def by(x: Any) -> Any:
+        return x % 100
+
+    def run(it: Any) -> None:
+        gather(
+            it, by, Fold.sum(), mode="hash", vectorized=True
+        )
+
+    t1 = timeit(lambda: run(items), number=1)
+    t2 = timeit(lambda: run(data), number=1)
+    assert t1 / t2 > 4
+
+
+def test_ordered_set() -> None:
+    s = OrderedSet("abracadabra")
+    assert list(s) == ["a", "b", "r", "c", "d"]
+    assert s.index("r") == 2
+    assert s[-1] == "d"
+    assert list(s[1:3]) == ["b", "r"]
+
+    s.discard("b")
+    s.add("b")
+    s.discard("z")
+    assert "b" in s
+    assert "z" not in s
+    assert list(s) == ["a", "r", "c", "d", "b"]
+    assert s.index("c") == 2
+    assert s[1] == "r"
+    assert s.pop() == "b"
+    assert len(s) == 4
+
+    s.update("xyz", "ax")
+    assert list(s) == ["a", "r", "c", "d", "x", "y", "z"]
+    assert list(s & {"z", "a"}) == ["a", "z"]
+    assert list(s - set("rcdxy")) == ["a", "z"]
+    assert list(s | {"q"}) == [*"arcdxyzq"]
+    assert repr(OrderedSet([1, 2])) == "OrderedSet([1, 2])"
+    with raises(ValueError, match="not in set"):
+        s.index("b")
+
+    for v in "rcdxy":
+        s.remove(v)
+    assert list(s) == ["a", "z"]
+    assert s[1] == "z"
+    with raises(IndexError):
+        s[2]
+
+    nums = OrderedSet(range(10))
+    assert nums.index(9) == 9
+    for v in (2, 5, 3):
+        nums.discard(v)
+    nums.add(2)
+    assert list(nums) == [0, 1, 4, 6, 7, 8, 9, 2]
+    assert [nums.index(v) for v in nums] == [*range(8)]
+    assert [nums[i] for i in range(-8, 8)] == [*nums, *nums]
+    s.clear()
+    with raises(KeyError):
+        s.pop()
+
+
+@manual_only
+def test_ordered_set_speed() -> None:
+    items = [random.randrange(10**6) for _ in range(10**6)]
+
+    def list_and_set() -> None:
+        seen: set[int] = set()
+        order: list[int] = []
+        for v in items:
+            if v not in seen:
+                seen.add(v)
+                order.append(v)
+
+    t1 = timeit(list_and_set, number=5)
+    t2 = timeit(lambda: OrderedSet(items), number=5)
+    t3 = timeit(lambda: dict.fromkeys(items), number=5)
+    assert t1 > t2
+    assert t2 / t3 < 1.5
+
+    s = OrderedSet(items)
+    t4 = timeit(lambda: s.index(items[-1]), number=10**5)
+    t5 = timeit(lambda: items.index(items[-1]), number=10)
+    assert t5 / 10 > 100 * t4 / 10**5
+
+    # holes from discards don't force a rebuild
+    middle = [*s][len(s) // 4 : len(s) // 2]
+
+    def discard_index() -> None:
+        s.discard(middle.pop())
+        s.index(items[-1])
+
+    t6 = timeit(discard_index, number=10**4)
+    assert t6 / 10**4 < t5 / 10 / 100
+
+
+def test_batched() -> None:
+    assert list(batched(range(5), 2)) == [
+        (0, 1),
+        (2, 3),
+        (4,),
+    ]
+    assert list(batched("abc", 2)) == [("a", "b"), ("c",)]
+    assert list(batched([], 2)) == []
+    with raises(ValueError, match="at least 1"):
+        batched([], 0)
+
+    data = bytearray(b"abcde")
+    views = list(batched(data, 2))
+    assert [v.tobytes() for v in views] == [
+        b"ab",
+        b"cd",
+        b"e",
+    ]
+    data[0] = ord("z")  # views share memory of data
+    assert views[0] == b"zb"
+
+    nums = array("i", range(5))
+    assert [v.tolist() for v in chunked(nums, 3)] == [
+        [0, 1, 2],
+        [3, 4],
+    ]
+    grid = memoryview(b"abcdef").cast("B", (2, 3))
+    assert [bytes(v) for v in chunked(grid, 4)] == [
+        b"abcd",
+        b"ef",
+    ]
+    ints = memoryview(array("i", range(6))).cast("B")
+    grid = ints.cast("i", (3, 2))
+    assert [v.tolist() for v in chunked(grid, 4)] == [
+        [0, 1, 2, 3],
+        [4, 5],
+    ]
+    np = importorskip("numpy")
+    cols = np.arange(6, dtype=np.int32).reshape(3, 2).T
+    assert [v.tolist() for v in chunked(cols, 4)] == [
+        [0, 2, 4, 1],
+        [3, 5],
+    ]
+
+
+def test_chunked() -> None:
+    assert list(chunked("abcde", 2)) == ["ab", "cd", "e"]
+    assert list(chunked([1, 2, 3], 2)) == [[1, 2], [3]]
+    assert list(chunked(iter("abc"), 2)) == [
+        ("a", "b"),
+        ("c",),
+    ]
+    chunks = list(chunked(b"abc", 2))
+    assert all(isinstance(c, memoryview) for c in chunks)
+
+
+def test_pmap() -> None:
+    assert list(pmap(str, range(50), workers=3)) == [
+        *map(str, range(50))
+    ]
+    got = pmap(is_even, range(50), ordered=False)
+    assert Counter(got) == {True: 25, False: 25}
+
+    read: list[int] = []
+
+    def numbers() -> Iter[int]:
+        for i in count():
+            read.append(i)
+            yield i
+
+    values = pmap(
+        abs, numbers(), workers=2, prefetch=3, chunk_size=2
+    )
+    assert list(islice(values, 5)) == [0, 1, 2, 3, 4]
+    # in flight chunks, plus one read ahead
+    assert len(read) <= 5 + (3 + 1) * 2
+
+    evens, odds = split(
+        pmap(
+            is_even, range(100), kind="process", chunk_size=8
+        )
+    )
+    assert len(list(evens)) == len(list(odds)) == 50
+
+    read.clear()
+    values = pmap(abs, numbers(), kind="process", prefetch=1)
+    assert next(values) == 0
+    assert len(read) >= 32  # batched by default
+
+    with raises(ZeroDivisionError):
+        list(pmap((1).__truediv__, [1, 0]))
+    with raises(ValueError, match="at least 1"):
+        pmap(str, [], prefetch=0)
+
+
+async def arange(n: int) -> AIter[int]:
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+def test_afirst() -> None:
+    assert asyncio.run(afirst(arange(3))) == 0
+    assert asyncio.run(afirst(arange(0), None)) is None
+    with raises(StopAsyncIteration):
+        asyncio.run(afirst(arange(0)))
+
+
+def test_asplit() -> None:
+    async def read_both() -> tuple[list[int], list[int]]:
+        evens, odds = asplit(arange(10), is_even)
+        return (
+            [i async for i in odds],
+            [i async for i in evens],
+        )
+
+    odds, evens = asyncio.run(read_both())
+    assert odds == [1, 3, 5, 7, 9]
+    assert evens == [0, 2, 4, 6, 8]
+
+    async def collect(side: AIter[int]) -> list[int]:
+        return [i async for i in side]
+
+    async def read_blocked() -> Two[list[int]]:
+        bigs, smalls = asplit(
+            arange(20),
+            lambda x: x >= 10,
+            max_buffer=2,
+            overflow="block",
+        )
+        return await asyncio.gather(
+            collect(bigs), collect(smalls)
+        )
+
+    bigs, smalls = asyncio.run(read_blocked())
+    assert bigs == [*range(10, 20)]
+    assert smalls == [*range(10)]
+
+    async def read_raising() -> None:
+        bigs, _ = asplit(
+            arange(20), lambda x: x >= 10, max_buffer=2
+        )
+        await anext(bigs)
+
+    with raises(BufferError):
+        asyncio.run(read_raising())
+
+    async def read_resumed() -> Two[list[int]]:
+        bigs, smalls = asplit(
+            arange(20), lambda x: x >= 10, max_buffer=2
+        )
+        with raises(BufferError):
+            await anext(bigs)
+        firsts = [await anext(smalls) for _ in range(10)]
+        return firsts, [v async for v in bigs]
+
+    smalls, bigs = asyncio.run(read_resumed())
+    assert smalls == [*range(10)]
+    assert bigs == [*range(10, 20)]
+
+
+def test_agather() -> None:
+    items = [random.randrange(50) for _ in range(100)]
+
+    async def aitems() -> AIter[int]:
+        for v in items:
+            await asyncio.sleep(0)
+            yield v
+
+    for mode in ("adjacent", "hash"):
+        got = asyncio.run(
+            agather(aitems(), str, list, mode=mode)
+        )
+        assert got == gather(items, str, list, mode=mode)
+        got = asyncio.run(
+            agather(aitems(), is_even, Fold.sum(), mode=mode)
+        )
+        assert got == gather(
+            items, is_even, Fold.sum(), mode=mode
+        )
+
+
+def test_apmap() -> None:
+    async def slow_str(x: int) -> str:
+        await asyncio.sleep(random.random() / 1000)
+        return str(x)
+
+    async def run(**kwds: Any) -> list[str]:
+        return [
+            v
+            async for v in apmap(
+                slow_str, arange(50), **kwds
+            )
+        ]
+
+    assert asyncio.run(run(limit=4)) == [
+        *map(str, range(50))
+    ]
+    got = asyncio.run(run(limit=4, ordered=False))
+    assert sorted(got) == sorted(map(str, range(50)))
+
+    async def reciprocal(x: int) -> float:
+        await asyncio.sleep(0)
+        return 1 / x
+
+    async def fail() -> None:
+        async for _ in apmap(reciprocal, arange(5)):
+            pass
+
+    with raises(ZeroDivisionError):
+        asyncio.run(fail())
+    with raises(ValueError, match="at least 1"):
+        apmap(slow_str, arange(1), limit=0)
+
+
+def test_windowed() -> None:
+    windows = windowed(range(5), 3)
+    assert [tuple(w) for w in windows] == [
+        (0, 1, 2),
+        (1, 2, 3),
+        (2, 3, 4),
+    ]
+    windows = windowed(range(8), 3, 2, copy=True)
+    assert list(windows) == [(0, 1, 2), (2, 3, 4), (4, 5, 6)]
+    assert list(windowed(range(9), 2, 4, copy=True)) == [
+        (0, 1),
+        (4, 5),
+    ]
+    assert list(
+        windowed(iter(range(9)), 3, 3, copy=True)
+    ) == [(0, 1, 2), (3, 4, 5), (6, 7, 8)]
+    assert list(windowed(range(2), 3)) == []
+    with raises(ValueError, match="at least 1"):
+        windowed(range(2), 3, 0)
+
+    np = importorskip("numpy")
+    data = np.arange(8)
+    views = list(windowed(data, 3, 2))
+    assert [list(v) for v in views] == [
+        [0, 1, 2],
+        [2, 3, 4],
+        [4, 5, 6],
+    ]
+    assert all(np.shares_memory(v, data) for v in views)
+
+
+def test_rolling() -> None:
+    items = [random.randrange(100) for _ in range(200)]
+    windows = list(windowed(items, 7, copy=True))
+    assert list(rolling_sum(items, 7)) == [
+        *map(sum, windows)
+    ]
+    assert list(rolling_min(items, 7)) == [
+        *map(min, windows)
+    ]
+    assert list(rolling_max(items, 7)) == [
+        *map(max, windows)
+    ]
+    means = [sum(w) / 7 for w in windows]
+    assert list(rolling_mean(items, 7)) == means
+    assert list(rolling_sum([1, 2], 3)) == []
+
+
+@manual_only
+def test_rolling_speed() -> None:
+    items = [random.random() for _ in range(10**4)]
+    windows = windowed(items, 1000)
+    t1 = timeit(lambda: deque(map(sum, windows)), number=1)
+    t2 = timeit(
+        lambda: deque(rolling_sum(items, 1000)), number=1
+    )
+    assert t1 / t2 > 10
+
+
+def test_merge_sorted() -> None:
+    runs = [
+        sorted(random.randrange(50) for _ in range(n))
+        for n in (0, 1, 10, 30)
+    ]
+    for k in range(5):
+        merged = list(merge_sorted(*runs[:k]))
+        assert merged == sorted(chain(*runs[:k]))
+        unique = list(merge_sorted(*runs[:k], unique=True))
+        assert unique == sorted(set(merged))
+
+    words = merge_sorted(
+        ["b", "C"], ["A", "c"], key=str.lower
+    )
+    assert list(words) == [
+        "A",
+        "b",
+        "C",
+        "c",
+    ]  # ties keep order
+    words = merge_sorted(
+        ["a", "B"], ["A", "b"], key=str.lower, unique=True
+    )
+    assert list(words) == ["a", "B"]
+
+
+@manual_only
+def test_merge_sorted_speed() -> None:
+    evens, odds = range(0, 10**6, 2), range(1, 10**6, 2)
+
+    def heapq_merge(**kwds: Any) -> None:
+        deque(heapq.merge(evens, odds, **kwds), maxlen=0)
+
+    def our_merge(**kwds: Any) -> None:
+        deque(merge_sorted(evens, odds, **kwds), maxlen=0)
+
+    t1 = timeit(heapq_merge, number=3)
+    t2 = timeit(our_merge, number=3)
+    assert t1 / t2 > 1.2
+    t3 = timeit(lambda: heapq_merge(key=abs), number=3)
+    t4 = timeit(lambda: our_merge(key=abs), number=3)
+    assert t3 / t4 > 1.5
+
+
+def test_top_k() -> None:
+    items = [random.randrange(1000) for _ in range(1000)]
+    assert top_k(items, 5) == sorted(items)[:-6:-1]
+    assert top_k(items, 3, key=neg) == sorted(items)[:3]
+    assert top_k([], 3) == []
+
+
+def test_reservoir() -> None:
+    assert reservoir(range(3), 5) == [0, 1, 2]
+    assert reservoir(range(10), 0) == []
+    sample = reservoir(range(10**4), 10, seed=1)
+    assert len(set(sample)) == 10
+    assert sample == reservoir(range(10**4), 10, seed=1)
+
+    counts = Counter[int]()
+    for seed in range(2000):
+        counts.update(reservoir(range(20), 5, seed=seed))
+    # each item is drawn 500 times in expectation
+    assert all(400 < counts[i] < 600 for i in range(20))
+
+
+def test_quantile_sketch() -> None:
+    items = [random.random() for _ in range(10**4)]
+    ranked = sorted(items)
+    sketch = QuantileSketch[float](seed=1)
+    sketch.update(items[:5000])
+    for v in items[5000:]:
+        sketch.add(v)
+    assert len(sketch) == len(items)
+    for q in (0.01, 0.5, 0.99):
+        rank = ranked.index(sketch.quantile(q)) / len(items)
+        assert abs(rank - q) < 0.02
+
+    with raises(ValueError, match="empty"):
+        QuantileSketch[int]().quantile(0.5)
+
+    groups = gather(
+        items, lambda v: v < 0.5, Fold.sketch(), mode="hash"
+    )
+    lows, highs = groups[True], groups[False]
+    lows.merge(highs)
+    assert len(lows) == len(items)
+    assert abs(lows.quantile(0.5) - 0.5) < 0.02
+
+
+def test_unique() -> None:
+    assert list(unique("abracadabra")) == [*"abrcd"]
+    assert list(unique("aAbBa", str.lower)) == ["a", "b"]
+
+    repeats = [1, 2, 3, 1, 4, 5, 6, 1, 1]
+    assert list(unique(repeats, mode="lru", capacity=2)) == [
+        1,
+        2,
+        3,
+        1,
+        4,
+        5,
+        6,
+        1,
+    ]
+    assert list(unique(repeats, mode="lru", capacity=3)) == [
+        1,
+        2,
+        3,
+        4,
+        5,
+        6,
+        1,
+    ]
+
+    items = [*range(10**4), *range(10**4)]
+    got = list(unique(items, mode="bloom", capacity=10**4))
+    assert len(got) == len(set(got))  # never repeats
+    assert 0.98 * 10**4 < len(got) <= 10**4
+    got = list(unique(map(str, items), len, mode="bloom"))
+    assert got == ["0", "10", "100", "1000"]
+    # equal keys are always found, whatever their type
+    assert list(unique([1, 1.0, True], mode="bloom")) == [1]
+
+    with raises(ValueError, match="Capacity"):
+        unique(items, mode="bloom", capacity=0)
+    for rate in (0, 1, 1.5):
+        with raises(ValueError, match="Error rate"):
+            unique(items, mode="bloom", error_rate=rate)
+
+
+@manual_only
+def test_unique_memory() -> None:
+    def peak(**kwds: Any) -> int:
+        tracemalloc.start()
+        deque(unique(range(10**5), **kwds), maxlen=0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    exact = peak()
+    bloom = peak(mode="bloom", capacity=10**5)
+    assert exact / bloom > 20
+
+
+def test_prefetch() -> None:
+    assert list(prefetch(range(1000), 7)) == [*range(1000)]
+    assert list(prefetch([])) == []
+
+    def failing() -> Iter[int]:
+        yield 1
+        yield 2
+        raise ZeroDivisionError
+
+    items = prefetch(failing())
+    assert next(items) == 1
+    assert next(items) == 2
+    with raises(ZeroDivisionError):
+        next(items)
+    assert list(items) == []
+
+    read: list[int] = []
+
+    def numbers() -> Iter[int]:
+        for i in count():
+            read.append(i)
+            yield i
+
+    ahead = prefetch(numbers(), depth=4)
+    assert next(ahead) == 0
+    time.sleep(0.05)
+    # a queued batch is handed out while the next is queued
+    assert len(read) <= 2 * 4 + 1
+    ahead.close()
+    n_read = len(read)
+    time.sleep(0.05)
+    assert len(read) <= n_read + 1
+    assert list(ahead) == []
+
+    def slow() -> Iter[int]:
+        for i in count():
+            time.sleep(0.02)
+            yield i
+
+    ahead = prefetch(slow())
+    assert next(ahead) == 0
+    ahead.close()  # while the thread is mid-read
+    time.sleep(0.05)
+    assert list(ahead) == []
+
+
+@manual_only
+def test_prefetch_speed() -> None:
+    payload = bytes(4 * 10**6)
+
+    def slow_reads() -> Iter[bytes]:
+        for _ in range(50):
+            time.sleep(0.004)  # eg waiting on disk
+            yield payload
+
+    def digest(data: bytes) -> bytes:
+        # releases the GIL, as eg decompression does
+        return hashlib.sha256(data).digest()
+
+    t1 = timeit(
+        lambda: deque(map(digest, slow_reads())), number=1
+    )
+    t2 = timeit(
+        lambda: deque(map(digest, prefetch(slow_reads()))),
+        number=1,
+    )
+    assert t1 / t2 > 1.6
+
+    fast = range(10**6)
+    t3 = timeit(lambda: deque(fast, maxlen=0), number=1)
+    t4 = timeit(
+        lambda: deque(prefetch(fast), maxlen=0), number=1
+    )
+    assert t4 - t3 < 1  # under a microsecond per item
+
+
+def test_replayable() -> None:
+    reads: list[int] = []
+
+    def expensive() -> Iter[int]:
+        for i in range(500):
+            reads.append(i)
+            yield i
+
+    items = replayable(expensive(), memory_limit=100)
+    first_pass, second_pass = iter(items), iter(items)
+    assert list(islice(first_pass, 10)) == [*range(10)]
+    assert len(reads) == 10  # read lazily
+    assert list(second_pass) == [*range(500)]
+    assert list(first_pass) == [*range(10, 500)]
+    assert list(items) == [*range(500)]
+    assert reads == [*range(500)]  # source read once
+
+    items = replayable(map(str, range(1000)), memory_limit=0)
+    with ThreadPoolExecutor() as executor:
+        passes = [
+            executor.submit(list, items) for _ in range(4)
+        ]
+        assert all(
+            p.result() == [*map(str, range(1000))]
+            for p in passes
+        )
+    items.close()
+    with raises(ValueError, match="closed file"):
+        list(items)
+
+
 def test_ii() -> None:
     r1 = ii(4, 8, ..., 20)
     assert isinstance(r1, range)
@@ -24,3 +995,78 @@ def test_ii() -> None:
 
     r4 = ii[4, ..., 8]
     assert list(r4) == [4, 5, 6, 7, 8]
+
+
+def test_interval_set() -> None:
+    s = IntervalSet(
+        ii[1, ..., 5], irange(4, 8), ii(20, ..., 23)
+    )
+    assert list(s.ranges()) == [range(1, 9), range(21, 23)]
+    assert [*s] == [*range(1, 9), 21, 22]
+    assert len(s) == 10
+    assert 8 in s
+    assert 9 not in s
+    assert 0 not in s
+    assert "1" not in s
+    assert (
+        repr(s) == "IntervalSet(range(1, 9), range(21, 23))"
+    )
+
+    stepped = IntervalSet(ii[0, 4, ..., 12], range(3, 0, -1))
+    assert [*stepped] == [0, 1, 2, 3, 4, 8, 12]
+    assert not IntervalSet(range(0))
+    assert IntervalSet.from_ints([
+        5,
+        1,
+        2,
+        3,
+        7,
+    ]) == IntervalSet(
+        irange(1, 3), irange(5, 5), irange(7, 7)
+    )
+    assert s == set(s)
+    assert s & {1, "a"} == {1}
+    assert s - {1, "a"} == set(s) - {1}
+    joined: object = {1} | s  # not typed as IntervalSet
+    assert isinstance(joined, IntervalSet)
+
+    for _ in range(100):
+        xs = {random.randrange(100) for _ in range(50)}
+        ys = {random.randrange(100) for _ in range(50)}
+        a, b = (
+            IntervalSet.from_ints(xs),
+            IntervalSet.from_ints(ys),
+        )
+        assert set(a | b) == xs | ys
+        assert set(a & b) == xs & ys
+        assert set(a - b) == xs - ys
+        assert set(a ^ b) == xs ^ ys
+        # with plain sets, in either order
+        assert a | ys == ys | a == xs | ys
+        assert a & ys == ys & a == xs & ys
+        assert a - ys == xs - ys
+        assert ys - a == ys - xs
+        assert a ^ ys == ys ^ a == xs ^ ys
+        assert all(
+            (v in a) == (v in xs) for v in range(-1, 101)
+        )
+
+
+@manual_only
+def test_interval_set_memory() -> None:
+    def ids() -> Iter[int]:
+        for start in range(0, 10**8, 10**4):
+            yield from range(start, start + 100)
+
+    def peak(make: Fn[[Iter[int]], object]) -> int:
+        tracemalloc.start()
+        made = make(ids())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del made
+        return peak
+
+    set_peak = peak(set)
+    intervals_peak = peak(IntervalSet.from_ints)
+    assert len(IntervalSet.from_ints(ids())) == 10**6
+    assert set_peak / intervals_peak > 10
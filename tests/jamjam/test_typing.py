@@ -1,21 +1,37 @@
+import gc
 import inspect
+import pickle  # noqa: S403
+import weakref
 from collections.abc import Callable
+from fractions import Fraction
+from functools import partial
+from timeit import timeit
 from typing import (
+    Annotated,
     Any,
     Literal,
+    Optional,
     TypeAlias,
     Union,
     assert_type,
+    cast,
+    get_overloads,
     overload,
 )
 
 from pytest import raises
 
+import jamjam.iter
+from jamjam._testing import manual_only
+from jamjam.iter import first, irange
 from jamjam.typing import (
     Check,
     Seq,
+    check_overloads,
     copy_params,
     copy_type,
+    get_hints,
+    get_hints_many,
     typing_only,
     use_overloads,
 )
@@ -40,6 +56,49 @@ def test_copy_signature() -> None:
     assert inspect.signature(f) == inspect.signature(g)
 
 
+def test_copy_signature_derived() -> None:
+    def f(obj: object, x: int, y: str = "") -> float:
+        _ = obj, y
+        return x
+
+    class A:
+        @copy_params(f)
+        def g(self, *args: Any, **kwargs: Any) -> float:
+            return f(self, *args, **kwargs)
+
+    bound = inspect.signature(A().g)
+    assert list(bound.parameters) == ["x", "y"]
+    sig = inspect.signature(partial(A.g, A(), 1))
+    assert list(sig.parameters) == ["y"]
+
+    sig = inspect.signature(A.g)
+    assert sig.replace(return_annotation=str) != sig
+    assert pickle.loads(pickle.dumps(sig)) == sig  # noqa: S301
+
+
+@manual_only
+def test_copy_params_speed() -> None:
+    def f(x: int, y: Seq[int], *args: str, z: bool) -> None:
+        _ = x, y, args, z
+
+    def eager(g: Callable) -> Callable:
+        g.__signature__ = inspect.signature(f)  # type: ignore[attr-defined]
+        g.__annotations__ = inspect.get_annotations(f)
+        return g
+
+    def decorate_1000(decorator: Callable) -> None:
+        for _ in range(1000):
+
+            @decorator
+            def g() -> None: ...
+
+    t1 = timeit(lambda: decorate_1000(eager), number=10)
+    t2 = timeit(
+        lambda: decorate_1000(copy_params(f)), number=10
+    )
+    assert t1 / t2 > 3
+
+
 def test_cope_type() -> None:
     @copy_type(hasattr)
     def noattr(*args: Any, **kwargs: Any) -> bool:
@@ -70,6 +129,95 @@ def test_use_overloads() -> None:
         f(z="a", y="b")  # type: ignore[call-overload]
 
 
+def test_use_overloads_dispatch() -> None:
+    @overload
+    def g(x: int) -> int:
+        return x
+
+    @overload
+    def g(x: int, y: int) -> int:
+        return x * 10 + y
+
+    @use_overloads
+    def g() -> None: ...
+
+    assert g(x=2) == 2
+    assert g(2, y=3) == g(2, 3) == 23
+
+    # later registrations invalidate the dispatch table
+    def g3(x: int, y: int, z: int) -> int:
+        return x + y + z
+
+    g3.__qualname__ = g.__qualname__
+    overload(g3)
+    assert g(1, 2, 3) == 6  # type: ignore[call-overload]
+
+
+def test_use_overloads_by_types() -> None:
+    @overload
+    def f(x: int) -> str:
+        return "int"
+
+    @overload
+    def f(x: float | Fraction) -> str:
+        return "number"
+
+    @overload
+    def f(x: Literal["a", "b"]) -> str:
+        return "letter"
+
+    @overload
+    def f(x: str | bytes, *args: int) -> str:
+        return f"text{sum(args)}"
+
+    @use_overloads(dispatch="types")
+    def f() -> None: ...
+
+    assert f(1) == f(x=True) == "int"
+    assert f(1.5) == f(x=Fraction(1, 2)) == "number"
+    assert f("a") == "letter"
+    assert f("c") == f(b"") == "text0"
+    assert f("c", 1, 2) == "text3"
+    with raises(TypeError, match="No overload"):
+        f([])  # type: ignore[call-overload]
+
+
+def test_check_overloads() -> None:
+    @overload
+    def f(x: int) -> int: ...
+    @overload
+    def f(x: int, *, y: int) -> int: ...
+    @check_overloads
+    def f(*args: int, **kwds: int) -> int:
+        return len(args) * 10 + len(kwds)
+
+    assert f(1) == 10
+    assert f(x=1) == 10  # passed as overload binds it
+    assert f(1, y=2) == 11
+    with raises(TypeError, match="No overload"):
+        f(1, 2)  # type: ignore[call-overload]
+
+
+@manual_only
+def test_overload_speed() -> None:
+    def naive(f: Callable, *args: object) -> object:
+        for o in get_overloads(f):
+            try:
+                inspect.signature(o).bind(*args)
+            except TypeError:
+                continue
+            return o(*args)
+        raise TypeError
+
+    n = 10_000
+    t1 = timeit(lambda: naive(first, [1]), number=n)
+    t2 = timeit(lambda: first([1]), number=n)
+    t3 = timeit(lambda: naive(irange, 1, 5), number=n)
+    t4 = timeit(lambda: irange(1, 5), number=n)
+    assert t1 / t2 > 5
+    assert t3 / t4 > 5
+
+
 def test_has_instance() -> None:
     Option: TypeAlias = Literal[1, 2, 3]
     x: Literal[Option, 4]
@@ -90,6 +238,156 @@ def test_has_instance() -> None:
     assert Check[V].has_instance([])
 
 
+def test_has_instance_containers() -> None:
+    assert Check[list[int]].has_instance([1, 2])
+    assert not Check[list[int]].has_instance([1, ""])
+    assert not Check[list[int]].has_instance((1, 2))
+
+    D: TypeAlias = dict[str, list[int] | None]
+    assert Check[D].has_instance({"a": [1], "b": None})
+    assert not Check[D].has_instance({1: None})
+
+    assert Check[tuple[int, str]].has_instance((1, ""))
+    assert not Check[tuple[int, str]].has_instance((1, 2))
+    assert not Check[tuple[int]].has_instance((1, 2))
+    assert Check[tuple[int, ...]].has_instance((1, 2, 3))
+    assert Check[tuple[int, ...]].has_instance(())
+
+    O: TypeAlias = Optional[Annotated[int, "meta"]]  # noqa: UP045
+    assert Check[O].has_instance(None)
+    assert Check[O].has_instance(1)
+    assert not Check[O].has_instance("")
+
+    N: TypeAlias = Union[int, Union[Literal["x"], bytes]]  # noqa: UP007
+    assert Check[N].has_instance("x")
+    assert not Check[N].has_instance("y")
+    assert not Check[Literal[1]].has_instance([])
+
+    f: object = len
+    assert Check[Callable[[], None]].has_instance(f)
+    with raises(NotImplementedError):
+        Check["int"].has_instance(1)
+
+
+def test_has_instance_modes() -> None:
+    big: list[object] = [*range(10**6), "bad"]
+    obj: object = big
+    assert not Check[list[int]].has_instance(obj)
+    assert not Check[list[int]].has_instance(obj, "sample")
+    big[-1] = 0
+    big[10**5] = "bad"
+    assert Check[list[int]].has_instance(obj, "sample")
+    assert Check[set[int]].has_instance({1, 2}, "sample")
+
+    D: TypeAlias = dict[str, list[tuple[int, str]]]
+    msg = r"obj\['b'\]\[1\]\[0\]: 'x' is not <class 'int'>"
+    with raises(TypeError, match=msg):
+        Check[D].has_instance(
+            {"a": [], "b": [(1, ""), ("x", "")]}, "fail"
+        )
+    with raises(TypeError, match=r"obj.keys\(\): 1 is not"):
+        Check[D].has_instance({1: []}, "fail")
+    assert Check[D].has_instance({"a": [(1, "")]}, "fail")
+
+
+def test_check_interned() -> None:
+    assert Check[int | str] is Check[int | str]
+    assert Check[int | str] is Check[Union[str, int]]  # noqa: UP007
+    assert Check[int] is not Check[str]
+    assert (
+        Check[Annotated[int, []]] is not None
+    )  # unhashable
+
+
+@manual_only
+def test_check_speed() -> None:
+    U: TypeAlias = int | str
+
+    def interned() -> None:
+        for x in range(100):
+            Check[U].has_instance(x)
+
+    def uninterned() -> None:
+        for x in range(100):
+            alias = type("Alias", (Check,), {}, _hint=U)
+            alias = cast(type[Check], alias)
+            alias.has_instance(x)
+
+    t1 = timeit(uninterned, number=100)
+    t2 = timeit(interned, number=100)
+    assert t1 / t2 > 10
+
+
+def test_check_collectable() -> None:
+    def new_kind() -> type:
+        kind = type("Kind", (), {})
+        assert Check[int].mask([kind()]) == [False]
+        assert Check[list[kind]].has_instance([kind()])  # type: ignore[valid-type]
+        return kind
+
+    # checkers and memos are bounded, so hold old kinds
+    # only until they're pushed out by newer ones
+    refs = [weakref.ref(new_kind()) for _ in range(2000)]
+    gc.collect()
+    assert refs[0]() is None
+
+
+def test_get_hints() -> None:
+    def f(x: int) -> str:
+        return str(x)
+
+    hints = get_hints(f)
+    assert hints == {"x": int, "return": str}
+    hints["x"] = bool  # returned dicts are copies
+    assert get_hints(f) == {"x": int, "return": str}
+
+    f.__annotations__ = {"y": "bytes"}
+    assert get_hints(f) == {"y": bytes}
+
+
+def test_get_hints_collectable() -> None:
+    def new_node() -> type:
+        class Node: ...
+
+        # hints referring to their class make a cycle
+        Node.__annotations__ = {"nxt": Node | None}
+        assert get_hints(Node) == {"nxt": Node | None}
+        return Node
+
+    refs = [weakref.ref(new_node()) for _ in range(10)]
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+
+def test_get_hints_many() -> None:
+    hints = get_hints_many(jamjam.iter)
+    assert "Iter" not in hints  # imported
+    pred_hint = Callable[[jamjam.iter.T], object]
+    assert hints["split"]["pred"] == pred_hint
+    assert get_hints(jamjam.iter.split) == hints["split"]
+
+
+def test_check_batches() -> None:
+    items = [1, "a", 2.0, None, 3, b""]
+    assert Check[int | None].mask(items) == [
+        True,
+        False,
+        False,
+        True,
+        True,
+        False,
+    ]
+    assert list(Check[int].filter(iter(items))) == [1, 3]
+    assert list(Check[Literal["a", 3]].filter(items)) == [
+        "a",
+        3,
+    ]
+
+    goods, bads = Check[str | bytes].partition(items)
+    assert list(bads) == [1, 2.0, None, 3]
+    assert list(goods) == ["a", b""]
+
+
 def test_typing_only() -> None:
     class B:
         def f(self) -> int: